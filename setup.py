@@ -36,6 +36,7 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "click>=8.0.0",
+        "numpy>=1.23.0",
         "simplekml>=1.3.6",
     ],
     entry_points={
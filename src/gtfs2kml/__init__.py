@@ -7,8 +7,30 @@ data into KML (Keyhole Markup Language) format for visualization in mapping tool
 
 __version__ = "0.1.0"
 
-from .models import Route, Shape, Stop, Trip
-from .gtfs_parser import GTFSParser
-from .kml_generator import KMLGenerator
+import importlib
 
 __all__ = ["Route", "Shape", "Stop", "Trip", "GTFSParser", "KMLGenerator"]
+
+# Public names are imported on first access so that `gtfs2kml --version`
+# and other light entry points don't pay for numpy/simplekml imports
+_LAZY_EXPORTS = {
+    "Route": ".models",
+    "Shape": ".models",
+    "Stop": ".models",
+    "Trip": ".models",
+    "GTFSParser": ".gtfs_parser",
+    "KMLGenerator": ".kml_generator",
+}
+
+
+def __getattr__(name):
+    """Import public names lazily (PEP 562)."""
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
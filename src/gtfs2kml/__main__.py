@@ -0,0 +1,8 @@
+"""
+Allow running the CLI with `python -m gtfs2kml`.
+"""
+
+from .cli import main
+
+if __name__ == '__main__':
+    main()
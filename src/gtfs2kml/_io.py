@@ -0,0 +1,40 @@
+"""
+File helpers shared by the parse and snap caches.
+"""
+
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+# Flags for a new private temporary file; O_BINARY only exists on Windows
+_TEMP_FILE_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[BinaryIO]:
+    """
+    Open a file for writing that replaces path only once it is complete.
+
+    Data is written to a temporary file in the same directory, which is
+    renamed over path when the block exits normally and removed if it
+    raises, so readers never see a partial file. The temporary file is
+    created with mode 0666, leaving the process umask to restrict it as
+    it would for a plain open().
+
+    Args:
+        path: File to write
+
+    Yields:
+        Binary file object for the new contents
+    """
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    fd = os.open(tmp_path, _TEMP_FILE_FLAGS, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -5,9 +5,10 @@ Provides a Click-based CLI for converting GTFS feeds to KML format.
 """
 
 import logging
+import os
 import sys
 from pathlib import Path
-from typing import Optional, Set
+from typing import TYPE_CHECKING, List, Optional, Set
 
 try:
     import click
@@ -17,8 +18,10 @@ except ImportError:
     )
 
 from . import __version__
-from .gtfs_parser import GTFSParser
-from .kml_generator import KMLGenerator
+
+if TYPE_CHECKING:
+    from .models import Route, Shape
+    from .road_snapper import PathDensifier, RoadSnapper
 
 
 def setup_logging(verbose: bool) -> None:
@@ -31,6 +34,55 @@ def setup_logging(verbose: bool) -> None:
     )
 
 
+def collect_shapes(routes: List["Route"]) -> List["Shape"]:
+    """Flatten the shapes of all routes into a single list, in route order."""
+    return [shape for route in routes for shape in route.shapes]
+
+
+def replace_shapes(routes: List["Route"], shapes: List["Shape"]) -> None:
+    """
+    Assign processed shapes back to their routes.
+
+    Args:
+        routes: Routes the shapes were collected from
+        shapes: Processed shapes, in the order returned by collect_shapes
+    """
+    shape_iter = iter(shapes)
+    for route in routes:
+        route.shapes = [next(shape_iter) for _ in route.shapes]
+
+
+def process_shapes(
+    routes: List["Route"],
+    snapper: Optional["RoadSnapper"] = None,
+    densifier: Optional["PathDensifier"] = None,
+    jobs: Optional[int] = None
+) -> None:
+    """
+    Snap and/or densify every shape of the given routes in place.
+
+    Snapping is network-bound and runs on threads. Densification is a single
+    vectorized NumPy pass per shape, so it runs in the current process;
+    shipping shapes to worker processes would cost more than the kernel.
+
+    Args:
+        routes: Routes whose shapes should be processed
+        snapper: Road snapper to apply, if any
+        densifier: Path densifier to apply after snapping, if any
+        jobs: Number of snapping threads (default: CPU count)
+    """
+    jobs = jobs or os.cpu_count()
+    shapes = collect_shapes(routes)
+
+    if snapper is not None:
+        shapes = snapper.snap_shapes_bulk(shapes, max_workers=jobs)
+
+    if densifier is not None:
+        shapes = [densifier.densify_shape(shape) for shape in shapes]
+
+    replace_shapes(routes, shapes)
+
+
 @click.command()
 @click.argument('gtfs_dir', type=click.Path(exists=True, file_okay=False, path_type=Path))
 @click.argument('output_dir', type=click.Path(path_type=Path))
@@ -89,6 +141,25 @@ def setup_logging(verbose: bool) -> None:
     type=click.Path(path_type=Path),
     help='Directory to cache snapped results (avoids re-processing)'
 )
+@click.option(
+    '--cache-parse',
+    is_flag=True,
+    help='Cache parsed shapes in GTFS_DIR/.gtfs2kml_cache to speed up repeat runs'
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(min=1),
+    default=os.cpu_count(),
+    show_default='number of CPUs',
+    help='Number of parallel workers for road snapping'
+)
+@click.option(
+    '--kml-jobs',
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help='Number of processes writing per-route KML files'
+)
 @click.version_option(version=__version__, prog_name='gtfs2kml')
 def main(
     gtfs_dir: Path,
@@ -102,7 +173,10 @@ def main(
     snap_provider: str,
     snap_api_key: Optional[str],
     densify_points: Optional[int],
-    snap_cache_dir: Optional[Path]
+    snap_cache_dir: Optional[Path],
+    cache_parse: bool,
+    jobs: int,
+    kml_jobs: int
 ) -> None:
     """
     Convert GTFS transit feeds to KML format.
@@ -130,10 +204,17 @@ def main(
 
       Use Mapbox for road snapping (requires API key):
         gtfs2kml ./gtfs_data ./output --snap-to-roads --snap-provider mapbox --snap-api-key YOUR_KEY
+
+      Limit parallelism to 4 workers:
+        gtfs2kml ./gtfs_data ./output --snap-to-roads --densify-points 100 -j 4
     """
     setup_logging(verbose)
     logger = logging.getLogger(__name__)
 
+    # Imported here rather than at module level to keep CLI startup fast
+    from .gtfs_parser import GTFSParser
+    from .kml_generator import KMLGenerator
+
     try:
         # Parse route filter
         route_filter: Optional[Set[str]] = None
@@ -143,17 +224,30 @@ def main(
 
         # Parse GTFS feed
         logger.info(f"Reading GTFS data from {gtfs_dir}")
-        parser = GTFSParser(gtfs_dir)
-        parsed_routes = parser.parse(route_filter=route_filter)
+        parse_cache_dir = gtfs_dir / '.gtfs2kml_cache' if cache_parse else None
+        parser = GTFSParser(gtfs_dir, cache_dir=parse_cache_dir)
+        # Snapping and densification only act on geometry, so routes
+        # without shapes are dropped before stops are linked
+        require_shapes = bool(snap_to_roads or densify_points)
+        # Trip details are not written to KML, so only trip links are kept
+        parsed_routes = parser.parse(
+            route_filter=route_filter,
+            require_shapes=require_shapes,
+            load_trips=False
+        )
 
         if not parsed_routes:
-            logger.error("No routes found matching criteria")
+            if require_shapes:
+                logger.error("No routes with shape data found matching criteria")
+            else:
+                logger.error("No routes found matching criteria")
             sys.exit(1)
 
         logger.info(f"Successfully parsed {len(parsed_routes)} routes")
+        routes_list = list(parsed_routes.values())
 
         # Check if any routes have shapes
-        routes_with_shapes = [r for r in parsed_routes.values() if r.has_shapes]
+        routes_with_shapes = [r for r in routes_list if r.has_shapes]
         if not routes_with_shapes:
             logger.warning(
                 "No routes have shape data! KML files will only contain stops. "
@@ -172,22 +266,17 @@ def main(
                     cache_dir=snap_cache_dir
                 )
 
-                for route in routes_with_shapes:
-                    snapped_shapes = []
-                    for shape in route.shapes:
-                        snapped = snapper.snap_shape(shape)
-                        snapped_shapes.append(snapped)
-                    route.shapes = snapped_shapes
+                process_shapes(routes_with_shapes, snapper=snapper, jobs=jobs)
 
                 logger.info("Road snapping completed")
 
             except ImportError as e:
                 logger.error(f"Road snapping requires additional dependencies: {e}")
-                click.echo(f"Error: Install dependencies with: pip install requests geopy", err=True)
+                click.echo("Error: Install dependencies with: pip install numpy requests", err=True)
                 sys.exit(1)
             except Exception as e:
                 logger.error(f"Road snapping failed: {e}")
-                click.echo(f"Warning: Road snapping failed, using original paths", err=True)
+                click.echo("Warning: Road snapping failed, using original paths", err=True)
 
         # Apply path densification if requested
         if densify_points and routes_with_shapes:
@@ -196,19 +285,13 @@ def main(
                 logger.info(f"Densifying paths at {densify_points}m intervals")
 
                 densifier = PathDensifier(interval_meters=float(densify_points))
-
-                for route in routes_with_shapes:
-                    densified_shapes = []
-                    for shape in route.shapes:
-                        densified = densifier.densify_shape(shape)
-                        densified_shapes.append(densified)
-                    route.shapes = densified_shapes
+                process_shapes(routes_with_shapes, densifier=densifier)
 
                 logger.info("Path densification completed")
 
             except ImportError as e:
-                logger.error(f"Path densification requires geopy: {e}")
-                click.echo(f"Error: Install geopy with: pip install geopy", err=True)
+                logger.error(f"Path densification requires additional dependencies: {e}")
+                click.echo("Error: Install dependencies with: pip install numpy requests", err=True)
                 sys.exit(1)
 
         # Generate KML
@@ -220,9 +303,10 @@ def main(
 
         split_by_route = (split_by.lower() == 'route')
         output_files = generator.generate_batch(
-            routes=list(parsed_routes.values()),
+            routes=routes_list,
             output_dir=output_dir,
-            split_by_route=split_by_route
+            split_by_route=split_by_route,
+            max_workers=kml_jobs
         )
 
         # Summary
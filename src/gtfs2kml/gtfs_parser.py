@@ -6,13 +6,68 @@ This module handles reading and parsing GTFS CSV files into data model objects.
 
 import csv
 import logging
+import os
+import sys
+import warnings
+import zipfile
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
-from .models import Route, Shape, ShapePoint, Stop, Trip
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is required. Install it with: pip install numpy")
+
+from ._io import atomic_write
+from .models import Route, Shape, StopTable, Trip
 
 logger = logging.getLogger(__name__)
 
+# Read buffer for feed files; large reads keep the syscall count low on
+# network or FUSE mounts, where each read is a round trip
+READ_BUFFER_SIZE = 1 << 20
+
+
+@contextmanager
+def _open_csv(path: Path) -> Iterator[Tuple[Dict[str, int], Iterator[List[str]]]]:
+    """
+    Open a GTFS CSV file for positional reading.
+
+    Rows are plain lists indexed through the header mapping, which avoids
+    building a dict per row as csv.DictReader does.
+
+    Args:
+        path: Path to the CSV file
+
+    Yields:
+        Tuple of (column name to index mapping, iterator over non-empty rows)
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='', buffering=READ_BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{path.name} has no header row")
+        yield {name.strip(): i for i, name in enumerate(header)}, filter(None, reader)
+
+
+def _float_or_nan(value: str) -> float:
+    """Convert a CSV field to float, treating empty values as NaN."""
+    return float(value) if value.strip() else np.nan
+
+
+def _interned(value: Optional[str]) -> Optional[str]:
+    """Intern a value that repeats across rows, so all rows share one string."""
+    return sys.intern(value) if value else value
+
+
+def _field(row: List[str], col: Optional[int], default: Optional[str] = None) -> Optional[str]:
+    """Return the value at a column index, or default if the column is absent."""
+    if col is None or col >= len(row):
+        return default
+    return row[col]
+
 
 class GTFSParser:
     """
@@ -22,45 +77,74 @@ class GTFSParser:
     shapes, trips, and stops.
     """
 
-    def __init__(self, gtfs_dir: Path):
+    # Rows of shapes.txt read into arrays at a time; bounds the memory used
+    # while reading very large feeds
+    SHAPES_BATCH_SIZE = 200_000
+
+    # Parsed shapes cache; bump the version when the array layout changes
+    SHAPES_CACHE_FILE = 'shapes.npz'
+    SHAPES_CACHE_VERSION = 1
+
+    def __init__(self, gtfs_dir: Path, cache_dir: Optional[Path] = None):
         """
         Initialize parser with GTFS directory.
 
         Args:
             gtfs_dir: Path to directory containing GTFS CSV files
+            cache_dir: Optional directory for caching parsed shapes between runs.
+                The cache is reused while shapes.txt keeps the same mtime and size.
         """
         self.gtfs_dir = Path(gtfs_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        # Lowercased file name -> path, filled by a single directory scan
+        self._files: Dict[str, Path] = {}
         self._validate_gtfs_directory()
 
         # Storage for parsed data
         self.routes: Dict[str, Route] = {}
         self.shapes: Dict[str, Shape] = {}
-        self.stops: Dict[str, Stop] = {}
+        self.stops = StopTable()
         self.trips: Dict[str, Trip] = {}
+        # trip_id -> route_id and trip_id -> shape_id for trips of loaded
+        # routes; filled even when Trip objects are not built
+        self.trip_routes: Dict[str, str] = {}
+        self.trip_shapes: Dict[str, str] = {}
 
     def _validate_gtfs_directory(self) -> None:
         """Validate that GTFS directory exists and contains required files."""
         if not self.gtfs_dir.exists():
             raise FileNotFoundError(f"GTFS directory not found: {self.gtfs_dir}")
 
-        required_files = ['routes.txt', 'trips.txt', 'stops.txt']
-        missing_files = []
+        # List the directory once instead of stat-ing each file as it's needed
+        with os.scandir(self.gtfs_dir) as entries:
+            self._files = {
+                entry.name.lower(): Path(entry.path)
+                for entry in entries if entry.is_file()
+            }
 
-        for filename in required_files:
-            if not (self.gtfs_dir / filename).exists():
-                missing_files.append(filename)
+        required_files = ['routes.txt', 'trips.txt', 'stops.txt']
+        missing_files = [name for name in required_files if name not in self._files]
 
         if missing_files:
             raise FileNotFoundError(
                 f"Missing required GTFS files: {', '.join(missing_files)}"
             )
 
-    def parse(self, route_filter: Optional[Set[str]] = None) -> Dict[str, Route]:
+    def parse(
+        self,
+        route_filter: Optional[Set[str]] = None,
+        require_shapes: bool = False,
+        load_trips: bool = True
+    ) -> Dict[str, Route]:
         """
         Parse GTFS feed and return routes with associated data.
 
         Args:
             route_filter: Optional set of route_ids to filter. If None, parse all routes.
+            require_shapes: If True, drop routes that have no shape data before
+                stops are linked.
+            load_trips: If False, only record which route and shape each trip
+                uses; Trip objects are not created and Route.trips stays empty.
 
         Returns:
             Dictionary mapping route_id to Route objects
@@ -70,8 +154,16 @@ class GTFSParser:
         # Parse in dependency order
         self._parse_routes(route_filter)
         self._parse_stops()
-        self._parse_shapes()
-        self._parse_trips()
+        self._parse_trips(load_trips)
+        # With a route filter, only shapes used by the selected routes' trips
+        # are read from shapes.txt
+        shape_filter = None
+        if route_filter is not None:
+            shape_filter = set(self.trip_shapes.values())
+        self._parse_shapes(shape_filter)
+        self._link_shapes_to_routes()
+        if require_shapes:
+            self._drop_routes_without_shapes()
         self._link_stops_to_routes()
 
         logger.info(f"Parsed {len(self.routes)} routes")
@@ -79,13 +171,22 @@ class GTFSParser:
 
     def _parse_routes(self, route_filter: Optional[Set[str]] = None) -> None:
         """Parse routes.txt file."""
-        routes_file = self.gtfs_dir / 'routes.txt'
+        routes_file = self._files['routes.txt']
         logger.debug(f"Parsing {routes_file}")
 
-        with open(routes_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                route_id = row['route_id']
+        with _open_csv(routes_file) as (column, rows):
+            id_col = column['route_id']
+            short_name_col = column.get('route_short_name')
+            long_name_col = column.get('route_long_name')
+            type_col = column.get('route_type')
+            agency_col = column.get('agency_id')
+            desc_col = column.get('route_desc')
+            url_col = column.get('route_url')
+            color_col = column.get('route_color')
+            text_color_col = column.get('route_text_color')
+
+            for row in rows:
+                route_id = row[id_col]
 
                 # Apply filter if provided
                 if route_filter and route_id not in route_filter:
@@ -93,127 +194,565 @@ class GTFSParser:
 
                 route = Route(
                     route_id=route_id,
-                    route_short_name=row.get('route_short_name', ''),
-                    route_long_name=row.get('route_long_name', ''),
-                    route_type=int(row.get('route_type', 3)),
-                    agency_id=row.get('agency_id'),
-                    route_desc=row.get('route_desc'),
-                    route_url=row.get('route_url'),
-                    route_color=row.get('route_color', 'FFFFFF'),
-                    route_text_color=row.get('route_text_color', '000000')
+                    route_short_name=_field(row, short_name_col, ''),
+                    route_long_name=_field(row, long_name_col, ''),
+                    route_type=int(_field(row, type_col) or 3),
+                    agency_id=_interned(_field(row, agency_col)),
+                    route_desc=_field(row, desc_col),
+                    route_url=_field(row, url_col),
+                    route_color=_interned(_field(row, color_col, 'FFFFFF')),
+                    route_text_color=_interned(_field(row, text_color_col, '000000'))
                 )
 
                 self.routes[route_id] = route
 
+                # Every requested route has been found; skip the rest of the file
+                if route_filter and len(self.routes) == len(route_filter):
+                    break
+
         logger.debug(f"Loaded {len(self.routes)} routes")
 
     def _parse_stops(self) -> None:
         """Parse stops.txt file."""
-        stops_file = self.gtfs_dir / 'stops.txt'
+        stops_file = self._files['stops.txt']
         logger.debug(f"Parsing {stops_file}")
 
-        with open(stops_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
+        with _open_csv(stops_file) as (column, rows):
+            id_col = column['stop_id']
+            name_col = column['stop_name']
+            lat_col = column['stop_lat']
+            lon_col = column['stop_lon']
+            code_col = column.get('stop_code')
+            location_type_col = column.get('location_type')
+            parent_col = column.get('parent_station')
+            wheelchair_col = column.get('wheelchair_boarding')
+
+            add_stop = self.stops.append
+            for row in rows:
                 # Skip non-stop location types (stations, entrances, etc.)
-                location_type = int(row.get('location_type', 0))
-                if location_type != 0:
+                location_type = _field(row, location_type_col)
+                if location_type and int(location_type) != 0:
                     continue
 
-                stop = Stop(
-                    stop_id=row['stop_id'],
-                    stop_name=row['stop_name'],
-                    stop_lat=float(row['stop_lat']),
-                    stop_lon=float(row['stop_lon']),
-                    stop_code=row.get('stop_code'),
-                    location_type=location_type,
-                    parent_station=row.get('parent_station'),
-                    wheelchair_boarding=int(row['wheelchair_boarding'])
-                        if row.get('wheelchair_boarding') else None
+                wheelchair_boarding = _field(row, wheelchair_col)
+                # Positional arguments: this loop runs once per stop and
+                # keyword binding is measurably slower
+                add_stop(
+                    row[id_col],
+                    row[name_col],
+                    float(row[lat_col]),
+                    float(row[lon_col]),
+                    _field(row, code_col),
+                    0,
+                    _interned(_field(row, parent_col)),
+                    int(wheelchair_boarding) if wheelchair_boarding else None,
                 )
 
-                self.stops[stop.stop_id] = stop
-
         logger.debug(f"Loaded {len(self.stops)} stops")
 
-    def _parse_shapes(self) -> None:
-        """Parse shapes.txt file if it exists."""
-        shapes_file = self.gtfs_dir / 'shapes.txt'
+    def _parse_shapes(self, shape_filter: Optional[Set[str]] = None) -> None:
+        """
+        Parse shapes.txt file if it exists.
+
+        Args:
+            shape_filter: Optional set of shape_ids to load. If None, load all shapes.
+        """
+        shapes_file = self._files.get('shapes.txt')
 
-        if not shapes_file.exists():
+        if shapes_file is None:
             logger.warning("shapes.txt not found - routes will not have geometry")
             return
 
+        if self.cache_dir is not None:
+            if self._load_shapes_cache(shapes_file, shape_filter):
+                return
+            # The cache holds the whole file, so rows can't be skipped
+            read_filter = None
+        else:
+            read_filter = shape_filter
+
         logger.debug(f"Parsing {shapes_file}")
 
-        with open(shapes_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                shape_id = row['shape_id']
+        with open(shapes_file, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader([f.readline()]), [])
+        column = {name.strip(): i for i, name in enumerate(header)}
 
-                point = ShapePoint(
-                    shape_id=shape_id,
-                    shape_pt_lat=float(row['shape_pt_lat']),
-                    shape_pt_lon=float(row['shape_pt_lon']),
-                    shape_pt_sequence=int(row['shape_pt_sequence']),
-                    shape_dist_traveled=float(row['shape_dist_traveled'])
-                        if row.get('shape_dist_traveled') else None
+        shape_numbers: Dict[str, int] = {}
+        try:
+            chunks = list(
+                self._read_shape_batches(shapes_file, column, shape_numbers, read_filter)
+            )
+        except ValueError as e:
+            # np.loadtxt rejects rows that leave off optional trailing fields,
+            # which GTFS allows; the csv reader pads them instead
+            logger.debug(f"Re-reading {shapes_file} with the csv reader: {e}")
+            shape_numbers.clear()
+            chunks = list(
+                self._read_shape_batches_csv(shapes_file, shape_numbers, read_filter)
+            )
+        if not chunks:
+            logger.debug("Loaded 0 shapes")
+            return
+
+        shape_idx = np.concatenate([numbers for numbers, _ in chunks])
+        values = np.concatenate([batch for _, batch in chunks])
+        del chunks
+
+        coords = np.column_stack((values['lat'], values['lon']))
+        seqs = np.ascontiguousarray(values['seq'])
+        dists = np.ascontiguousarray(values['dist']) if 'dist' in values.dtype.names else None
+        del values
+
+        # Most feeds list each shape's points contiguously and in sequence
+        # order; only sort when they don't. One stable sort by (shape,
+        # sequence) replaces a sort per shape.
+        same_shape = shape_idx[1:] == shape_idx[:-1]
+        presorted = bool(
+            np.all(shape_idx[1:] >= shape_idx[:-1])
+            and np.all(seqs[1:][same_shape] >= seqs[:-1][same_shape])
+        )
+        if not presorted:
+            order = np.lexsort((seqs, shape_idx))
+            shape_idx = shape_idx[order]
+            coords = coords[order]
+            seqs = seqs[order]
+            if dists is not None:
+                dists = dists[order]
+
+        starts = np.searchsorted(shape_idx, np.arange(len(shape_numbers) + 1))
+
+        shape_ids = list(shape_numbers)
+        self._build_shapes(shape_ids, starts, coords, seqs, dists, shape_filter)
+        logger.debug(f"Loaded {len(self.shapes)} shapes")
+
+        if self.cache_dir is not None:
+            self._save_shapes_cache(shapes_file, shape_ids, starts, coords, seqs, dists)
+
+    def _build_shapes(
+        self,
+        shape_ids: List[str],
+        starts: np.ndarray,
+        coords: np.ndarray,
+        seqs: np.ndarray,
+        dists: Optional[np.ndarray],
+        shape_filter: Optional[Set[str]] = None
+    ) -> None:
+        """
+        Create Shape objects from arrays grouped by shape.
+
+        Args:
+            shape_ids: Shape IDs, in group order
+            starts: Group boundaries; shape i spans starts[i]:starts[i + 1]
+            coords: (N, 2) array of (latitude, longitude) rows
+            seqs: Point sequence numbers
+            dists: Distances traveled, or None if not available
+            shape_filter: Optional set of shape_ids to build. If None, build all.
+        """
+        # Shapes are built directly from slices of the sorted arrays
+        for number, shape_id in enumerate(shape_ids):
+            if shape_filter is not None and shape_id not in shape_filter:
+                continue
+            start, end = starts[number], starts[number + 1]
+            self.shapes[shape_id] = Shape.from_arrays(
+                shape_id,
+                coords[start:end],
+                seqs[start:end],
+                dists[start:end] if dists is not None else None,
+            )
+
+    def _load_shapes_cache(
+        self,
+        shapes_file: Path,
+        shape_filter: Optional[Set[str]] = None
+    ) -> bool:
+        """
+        Load shapes from the parse cache if it matches shapes.txt.
+
+        Args:
+            shapes_file: Path to the source shapes.txt
+            shape_filter: Optional set of shape_ids to load. If None, load all shapes.
+
+        Returns:
+            True if shapes were loaded from the cache
+        """
+        cache_file = self.cache_dir / self.SHAPES_CACHE_FILE
+        if not cache_file.exists():
+            return False
+
+        source = shapes_file.stat()
+        try:
+            with np.load(cache_file, allow_pickle=False) as data:
+                if (
+                    int(data['version']) != self.SHAPES_CACHE_VERSION
+                    or int(data['source_mtime_ns']) != source.st_mtime_ns
+                    or int(data['source_size']) != source.st_size
+                ):
+                    logger.debug(f"Parse cache {cache_file} is stale")
+                    return False
+
+                self._build_shapes(
+                    data['shape_ids'].tolist(),
+                    data['starts'],
+                    data['coords'],
+                    data['seqs'],
+                    data['dists'] if bool(data['has_dists']) else None,
+                    shape_filter,
+                )
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning(f"Ignoring unreadable parse cache {cache_file}: {e}")
+            self.shapes.clear()
+            return False
+
+        logger.debug(f"Loaded {len(self.shapes)} shapes from {cache_file}")
+        return True
+
+    def _save_shapes_cache(
+        self,
+        shapes_file: Path,
+        shape_ids: List[str],
+        starts: np.ndarray,
+        coords: np.ndarray,
+        seqs: np.ndarray,
+        dists: Optional[np.ndarray]
+    ) -> None:
+        """Write parsed shape arrays to the parse cache."""
+        cache_file = self.cache_dir / self.SHAPES_CACHE_FILE
+        source = shapes_file.stat()
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            with atomic_write(cache_file) as f:
+                np.savez(
+                    f,
+                    version=self.SHAPES_CACHE_VERSION,
+                    source_mtime_ns=source.st_mtime_ns,
+                    source_size=source.st_size,
+                    shape_ids=np.array(shape_ids, dtype=str),
+                    starts=starts,
+                    coords=coords,
+                    seqs=seqs,
+                    has_dists=dists is not None,
+                    dists=dists if dists is not None else np.empty(0),
                 )
 
-                if shape_id not in self.shapes:
-                    self.shapes[shape_id] = Shape(shape_id=shape_id)
+            logger.debug(f"Cached parsed shapes to {cache_file}")
 
-                self.shapes[shape_id].add_point(point)
+        except Exception as e:
+            logger.warning(f"Failed to cache parsed shapes: {e}")
 
-        # Sort all shape points by sequence
-        for shape in self.shapes.values():
-            shape.sort_points()
+    def _read_shape_batches(
+        self,
+        shapes_file: Path,
+        column: Dict[str, int],
+        shape_numbers: Dict[str, int],
+        shape_filter: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Read shapes.txt in batches with NumPy's C text parser.
 
-        logger.debug(f"Loaded {len(self.shapes)} shapes")
+        Shape IDs and numeric columns need different dtypes, so the file is
+        read through two handles kept in step, one batch at a time. With a
+        shape filter, lines are read in Python and only matching ones are
+        handed to the parser instead.
 
-    def _parse_trips(self) -> None:
-        """Parse trips.txt file and link to routes and shapes."""
-        trips_file = self.gtfs_dir / 'trips.txt'
-        logger.debug(f"Parsing {trips_file}")
+        Args:
+            shapes_file: Path to shapes.txt
+            column: Column name to index mapping from the header
+            shape_numbers: Shape ID to number mapping, extended in order of
+                first appearance across batches
+            shape_filter: Optional set of shape_ids whose rows are needed.
+                Rows of other shapes may still be returned.
+
+        Yields:
+            Tuple of (shape numbers, structured array with lat, lon, seq
+            and, if present, dist fields)
+        """
+        if not column:
+            return
+
+        value_cols = [column['shape_pt_lat'], column['shape_pt_lon'], column['shape_pt_sequence']]
+        value_dtype = [('lat', np.float64), ('lon', np.float64), ('seq', np.int64)]
+        converters = None
+        dist_col = column.get('shape_dist_traveled')
+        if dist_col is not None:
+            value_cols.append(dist_col)
+            value_dtype.append(('dist', np.float64))
+            # shape_dist_traveled may be left empty on individual rows
+            converters = {dist_col: _float_or_nan}
+
+        options = dict(
+            delimiter=',', comments=None, quotechar='"', ndmin=1,
+            max_rows=self.SHAPES_BATCH_SIZE,
+        )
+
+        if shape_filter is not None:
+            yield from self._read_filtered_shape_batches(
+                shapes_file, column['shape_id'], value_cols, value_dtype,
+                converters, options, shape_numbers, shape_filter,
+            )
+            return
+
+        file_options = dict(encoding='utf-8-sig', buffering=READ_BUFFER_SIZE)
+        with open(shapes_file, 'r', **file_options) as id_file, \
+                open(shapes_file, 'r', **file_options) as value_file:
+            id_file.readline()
+            value_file.readline()
+
+            with warnings.catch_warnings():
+                # loadtxt warns about blank lines and about empty reads at EOF
+                warnings.simplefilter('ignore', UserWarning)
+                while True:
+                    ids = np.loadtxt(
+                        id_file, dtype=str, usecols=(column['shape_id'],), **options
+                    )
+                    if len(ids) == 0:
+                        return
+                    values = np.loadtxt(
+                        value_file, dtype=value_dtype, usecols=value_cols,
+                        converters=converters, **options
+                    )
+                    yield self._number_shapes(ids, shape_numbers), values
+
+                    if len(ids) < self.SHAPES_BATCH_SIZE:
+                        return
+
+    def _read_shape_batches_csv(
+        self,
+        shapes_file: Path,
+        shape_numbers: Dict[str, int],
+        shape_filter: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Read shapes.txt in batches with the csv reader.
+
+        Slower than _read_shape_batches, but accepts rows with missing
+        trailing fields; a missing shape_dist_traveled is read as NaN.
+
+        Args:
+            shapes_file: Path to shapes.txt
+            shape_numbers: Shape ID to number mapping, extended in order of
+                first appearance across batches
+            shape_filter: Optional set of shape_ids whose rows are needed
+
+        Yields:
+            Tuple of (shape numbers, structured array with lat, lon, seq
+            and, if present, dist fields)
+        """
+        with _open_csv(shapes_file) as (column, reader):
+            id_col = column['shape_id']
+            lat_col = column['shape_pt_lat']
+            lon_col = column['shape_pt_lon']
+            seq_col = column['shape_pt_sequence']
+            dist_col = column.get('shape_dist_traveled')
+
+            value_dtype = [('lat', np.float64), ('lon', np.float64), ('seq', np.int64)]
+            if dist_col is not None:
+                value_dtype.append(('dist', np.float64))
+
+            while True:
+                rows = list(islice(reader, self.SHAPES_BATCH_SIZE))
+                if not rows:
+                    return
+                if shape_filter is not None:
+                    rows = [row for row in rows if row[id_col] in shape_filter]
+                    if not rows:
+                        continue
+
+                ids = np.array([row[id_col] for row in rows])
+                if dist_col is None:
+                    values = [
+                        (float(row[lat_col]), float(row[lon_col]), int(row[seq_col]))
+                        for row in rows
+                    ]
+                else:
+                    values = [
+                        (
+                            float(row[lat_col]), float(row[lon_col]), int(row[seq_col]),
+                            _float_or_nan(_field(row, dist_col, '')),
+                        )
+                        for row in rows
+                    ]
+                yield self._number_shapes(ids, shape_numbers), np.array(values, dtype=value_dtype)
+
+    def _read_filtered_shape_batches(
+        self,
+        shapes_file: Path,
+        id_col: int,
+        value_cols: List[int],
+        value_dtype: List[Tuple[str, type]],
+        converters: Optional[Dict[int, Callable[[str], float]]],
+        options: Dict[str, Any],
+        shape_numbers: Dict[str, int],
+        shape_filter: Set[str]
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Read the shapes.txt rows of selected shapes in batches.
 
-        with open(trips_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                route_id = row['route_id']
+        Splitting a line on commas is much cheaper than parsing it, so lines
+        of other shapes are dropped before they reach np.loadtxt. Lines with
+        quotes can't be split naively and are always kept; _build_shapes
+        skips any extra shapes they bring in.
 
+        Yields:
+            Tuple of (shape numbers, structured array of values) per batch
+        """
+        with open(shapes_file, 'r', encoding='utf-8-sig', buffering=READ_BUFFER_SIZE) as f:
+            f.readline()
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                while True:
+                    lines = list(islice(f, self.SHAPES_BATCH_SIZE))
+                    if not lines:
+                        return
+
+                    kept = []
+                    for line in lines:
+                        if '"' in line:
+                            kept.append(line)
+                            continue
+                        fields = line.split(',', id_col + 1)
+                        if len(fields) > id_col and fields[id_col].rstrip('\r\n') in shape_filter:
+                            kept.append(line)
+
+                    if kept:
+                        ids = np.loadtxt(kept, dtype=str, usecols=(id_col,), **options)
+                        values = np.loadtxt(
+                            kept, dtype=value_dtype, usecols=value_cols,
+                            converters=converters, **options
+                        )
+                        yield self._number_shapes(ids, shape_numbers), values
+
+    @staticmethod
+    def _number_shapes(ids: np.ndarray, shape_numbers: Dict[str, int]) -> np.ndarray:
+        """
+        Map shape IDs to shape numbers.
+
+        Args:
+            ids: Shape ID per row
+            shape_numbers: Shape ID to number mapping, extended with new IDs
+
+        Returns:
+            Shape number per row
+        """
+        # Rows of a shape are usually contiguous, so only look up IDs where
+        # they change
+        run_starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+        run_numbers = [
+            shape_numbers.setdefault(shape_id, len(shape_numbers))
+            for shape_id in ids[run_starts].tolist()
+        ]
+        run_lengths = np.diff(np.append(run_starts, len(ids)))
+        return np.repeat(np.array(run_numbers, dtype=np.int64), run_lengths)
+
+    def _parse_trips(self, load_trips: bool = True) -> None:
+        """
+        Parse trips.txt file and link trips to routes.
+
+        Args:
+            load_trips: If False, skip building Trip objects
+        """
+        trips_file = self._files['trips.txt']
+        logger.debug(f"Parsing {trips_file}")
+
+        with _open_csv(trips_file) as (column, rows):
+            route_col = column['route_id']
+            trip_col = column['trip_id']
+            service_col = column['service_id']
+            headsign_col = column.get('trip_headsign')
+            short_name_col = column.get('trip_short_name')
+            direction_col = column.get('direction_id')
+            block_col = column.get('block_id')
+            shape_col = column.get('shape_id')
+            wheelchair_col = column.get('wheelchair_accessible')
+            bikes_col = column.get('bikes_allowed')
+
+            trip_routes = self.trip_routes
+            trip_shapes = self.trip_shapes
+
+            for row in rows:
                 # Only process trips for routes we've loaded
-                if route_id not in self.routes:
+                route = self.routes.get(row[route_col])
+                if route is None:
+                    continue
+
+                # Reuse the route's own route_id string rather than keeping
+                # one copy per trip
+                route_id = route.route_id
+                trip_id = row[trip_col]
+                shape_id = _field(row, shape_col)
+                trip_routes[trip_id] = route_id
+                if shape_id:
+                    shape_id = sys.intern(shape_id)
+                    trip_shapes[trip_id] = shape_id
+                else:
+                    trip_shapes.pop(trip_id, None)
+
+                if not load_trips:
                     continue
 
+                direction_id = _field(row, direction_col)
+                wheelchair_accessible = _field(row, wheelchair_col)
+                bikes_allowed = _field(row, bikes_col)
                 trip = Trip(
-                    trip_id=row['trip_id'],
+                    trip_id=trip_id,
                     route_id=route_id,
-                    service_id=row['service_id'],
-                    trip_headsign=row.get('trip_headsign'),
-                    trip_short_name=row.get('trip_short_name'),
-                    direction_id=int(row['direction_id']) if row.get('direction_id') else None,
-                    block_id=row.get('block_id'),
-                    shape_id=row.get('shape_id'),
-                    wheelchair_accessible=int(row['wheelchair_accessible'])
-                        if row.get('wheelchair_accessible') else None,
-                    bikes_allowed=int(row['bikes_allowed'])
-                        if row.get('bikes_allowed') else None
+                    service_id=sys.intern(row[service_col]),
+                    trip_headsign=_interned(_field(row, headsign_col)),
+                    trip_short_name=_field(row, short_name_col),
+                    direction_id=int(direction_id) if direction_id else None,
+                    block_id=_field(row, block_col),
+                    shape_id=shape_id,
+                    wheelchair_accessible=int(wheelchair_accessible)
+                        if wheelchair_accessible else None,
+                    bikes_allowed=int(bikes_allowed) if bikes_allowed else None
                 )
 
                 self.trips[trip.trip_id] = trip
 
                 # Link trip to route
-                route = self.routes[route_id]
                 route.add_trip(trip)
 
-                # Link shape to route if available
-                if trip.shape_id and trip.shape_id in self.shapes:
-                    shape = self.shapes[trip.shape_id]
-                    # Only add unique shapes to route
-                    if not any(s.shape_id == shape.shape_id for s in route.shapes):
-                        route.add_shape(shape)
+        logger.debug(f"Loaded {len(self.trip_routes)} trips")
+
+    def _link_shapes_to_routes(self) -> None:
+        """Link each route to the shapes used by its trips, in trip order."""
+        # (route_id, shape_id) pairs already linked; a route's trips
+        # mostly repeat a handful of shapes
+        linked_shapes: Set[Tuple[str, str]] = set()
+
+        for trip_id, shape_id in self.trip_shapes.items():
+            if shape_id in self.shapes:
+                # Only add unique shapes to route
+                route_id = self.trip_routes[trip_id]
+                key = (route_id, shape_id)
+                if key not in linked_shapes:
+                    linked_shapes.add(key)
+                    self.routes[route_id].add_shape(self.shapes[shape_id])
+
+    def _drop_routes_without_shapes(self) -> None:
+        """Remove routes without shapes, along with their trips."""
+        shapeless = {route_id for route_id, route in self.routes.items() if not route.has_shapes}
+        if not shapeless:
+            return
 
-        logger.debug(f"Loaded {len(self.trips)} trips")
+        for route_id in shapeless:
+            del self.routes[route_id]
+        self.trip_routes = {
+            trip_id: route_id for trip_id, route_id in self.trip_routes.items()
+            if route_id not in shapeless
+        }
+        self.trip_shapes = {
+            trip_id: shape_id for trip_id, shape_id in self.trip_shapes.items()
+            if trip_id in self.trip_routes
+        }
+        self.trips = {
+            trip_id: trip for trip_id, trip in self.trips.items()
+            if trip_id in self.trip_routes
+        }
+
+        logger.info(f"Skipped {len(shapeless)} routes without shapes")
 
     def _link_stops_to_routes(self) -> None:
         """
@@ -221,27 +760,50 @@ class GTFSParser:
 
         This is more memory-intensive so we only do it if needed.
         """
-        stop_times_file = self.gtfs_dir / 'stop_times.txt'
+        stop_times_file = self._files.get('stop_times.txt')
 
-        if not stop_times_file.exists():
+        if stop_times_file is None:
             logger.warning("stop_times.txt not found - stops will not be linked to routes")
             return
 
+        if not self.trip_routes:
+            logger.debug("No trips loaded - skipping stop_times.txt")
+            return
+
         logger.debug(f"Parsing {stop_times_file} to link stops")
 
         # Track which stops belong to which routes
         route_stops: Dict[str, Set[str]] = {rid: set() for rid in self.routes.keys()}
 
-        with open(stop_times_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                trip_id = row['trip_id']
-                stop_id = row['stop_id']
-
-                # Only process if we know this trip
-                if trip_id in self.trips:
-                    route_id = self.trips[trip_id].route_id
-                    route_stops[route_id].add(stop_id)
+        # Only trips of loaded routes are known, so rows of filtered-out
+        # routes are dropped with a single dict lookup
+        trip_routes = self.trip_routes
+
+        with open(
+            stop_times_file, 'r', encoding='utf-8-sig', newline='', buffering=READ_BUFFER_SIZE
+        ) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                logger.warning("stop_times.txt is empty - stops will not be linked to routes")
+                return
+
+            column = {name.strip(): i for i, name in enumerate(header)}
+            trip_col = column['trip_id']
+            stop_col = column['stop_id']
+
+            # Rows are grouped by trip in practice, so the route lookup is
+            # redone only when trip_id changes
+            last_trip_id = None
+            add_stop = None
+            for row in filter(None, reader):
+                trip_id = row[trip_col]
+                if trip_id != last_trip_id:
+                    last_trip_id = trip_id
+                    route_id = trip_routes.get(trip_id)
+                    add_stop = route_stops[route_id].add if route_id is not None else None
+                if add_stop is not None:
+                    add_stop(row[stop_col])
 
         # Add stops to routes
         for route_id, stop_ids in route_stops.items():
@@ -5,21 +5,41 @@ This module handles converting Route objects into KML format files.
 """
 
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List
 
-try:
-    import simplekml
-except ImportError:
-    raise ImportError(
-        "simplekml is required. Install it with: pip install simplekml"
-    )
+from .kml_writer import StreamingKMLWriter
+from .models import Route, Stop
 
-from .models import Route
+if TYPE_CHECKING:
+    import simplekml
 
 logger = logging.getLogger(__name__)
 
 
+def _import_simplekml():
+    """Import simplekml on demand; it is only needed for in-memory output."""
+    try:
+        import simplekml
+    except ImportError:
+        raise ImportError(
+            "simplekml is required. Install it with: pip install simplekml"
+        )
+    return simplekml
+
+
+def _write_one_route(
+    settings: Dict[str, Any],
+    route: Route,
+    output_path: Path,
+    color_index: int
+) -> Path:
+    """Write a single route's KML file; module-level so worker processes can run it."""
+    KMLGenerator(**settings).generate_route_kml(route, output_path, color_index=color_index)
+    return output_path
+
+
 class KMLGenerator:
     """
     Generator for KML files from GTFS route data.
@@ -36,12 +56,15 @@ class KMLGenerator:
         'ffb22222', 'ffffffff', 'ff1e90ff', 'ffffff00', 'ff7cfc00', 'ffd2691e',
         'ffff4500', 'ffff69b4', 'fff0e68c', 'ff00ffff'
     ]
+    STOP_ICON_SCALE = 0.8
+    STOP_ICON_HREF = "http://maps.google.com/mapfiles/kml/pushpin/ylw-pushpin.png"
 
     def __init__(
         self,
         line_width: int = 4,
         include_stops: bool = True,
-        altitude_mode: str = 'clampToGround'
+        altitude_mode: str = 'clampToGround',
+        streaming: bool = True
     ):
         """
         Initialize KML generator.
@@ -50,11 +73,28 @@ class KMLGenerator:
             line_width: Width of route lines in pixels
             include_stops: Whether to include stop markers in output
             altitude_mode: KML altitude mode (clampToGround, relativeToGround, absolute)
+            streaming: If True, write KML directly to disk with StreamingKMLWriter.
+                If False, build the document in memory with simplekml.
         """
         self.line_width = line_width
         self.include_stops = include_stops
         self.altitude_mode = altitude_mode
-
+        self.streaming = streaming
+
+    @property
+    def _settings(self) -> Dict[str, Any]:
+        """Constructor arguments, sent to worker processes instead of the generator."""
+        return {
+            "line_width": self.line_width,
+            "include_stops": self.include_stops,
+            "altitude_mode": self.altitude_mode,
+            "streaming": self.streaming,
+        }
+
+    @property
+    def _use_streaming(self) -> bool:
+        """Whether to stream output; unusual altitude modes fall back to simplekml."""
+        return self.streaming and self.altitude_mode in StreamingKMLWriter.ALTITUDE_MODES
 
     def generate_route_kml(
         self,
@@ -72,7 +112,166 @@ class KMLGenerator:
             include_multiple_shapes: If True, include all shape variants (directions)
         """
         logger.info(f"Generating KML for route {route.display_name}")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._use_streaming:
+            self._write_route_kml(route, output_path, include_multiple_shapes, color_index)
+        else:
+            kml = self._build_route_kml(route, include_multiple_shapes, color_index)
+            kml.save(str(output_path))
+        logger.info(f"Saved KML to {output_path}")
+
+    def generate_all_routes_kml(
+        self,
+        routes: List[Route],
+        output_path: Path
+    ) -> None:
+        """
+        Generate a single KML file containing all routes.
+
+        Args:
+            routes: List of Route objects to include
+            output_path: Path where KML file will be saved
+        """
+        logger.info(f"Generating combined KML for {len(routes)} routes")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._use_streaming:
+            self._write_all_routes_kml(routes, output_path)
+        else:
+            kml = self._build_all_routes_kml(routes)
+            kml.save(str(output_path))
+        logger.info(f"Saved combined KML to {output_path}")
+
+    def _write_route_kml(
+        self,
+        route: Route,
+        output_path: Path,
+        include_multiple_shapes: bool,
+        color_index: int
+    ) -> None:
+        """Stream a single route's KML document to disk."""
+        color = self._color(color_index)
+        include_stops = self.include_stops and route.has_stops
+
+        with StreamingKMLWriter(output_path, self.altitude_mode) as writer:
+            writer.begin_document(f"Route {route.display_name}", route.route_desc)
+
+            if route.has_shapes:
+                writer.add_line_style("route-line", color, self.line_width)
+            if include_stops:
+                writer.add_icon_style("route-stop", color, self.STOP_ICON_SCALE, self.STOP_ICON_HREF)
+
+            if route.has_shapes:
+                writer.begin_folder("Route Paths")
+                self._write_shapes(writer, route, include_multiple_shapes, "route-line")
+                writer.end_folder()
+
+            if include_stops:
+                writer.begin_folder("Stops")
+                self._write_stops(writer, route, "route-stop")
+                writer.end_folder()
+
+            writer.end_document()
+
+    def _write_all_routes_kml(self, routes: List[Route], output_path: Path) -> None:
+        """Stream a combined KML document for all routes to disk."""
+        with StreamingKMLWriter(output_path, self.altitude_mode) as writer:
+            writer.begin_document("All Routes")
+
+            # Colors cycle through the palette, so routes sharing a color
+            # share one pair of document-level styles
+            for c in range(min(len(routes), len(self.PREDEFINED_COLORS))):
+                color = self._color(c)
+                writer.add_line_style(f"shared-{c}-line", color, self.line_width)
+                if self.include_stops:
+                    writer.add_icon_style(
+                        f"shared-{c}-stop", color, self.STOP_ICON_SCALE, self.STOP_ICON_HREF
+                    )
+
+            for i, route in enumerate(routes):
+                color_slot = i % len(self.PREDEFINED_COLORS)
+                include_stops = self.include_stops and route.has_stops
+                line_style_id = f"shared-{color_slot}-line"
+                stop_style_id = f"shared-{color_slot}-stop"
+
+                writer.begin_folder(f"Route {route.display_name}", route.route_desc)
+
+                if route.has_shapes:
+                    writer.begin_folder("Paths")
+                    self._write_shapes(writer, route, True, line_style_id)
+                    writer.end_folder()
+
+                if include_stops:
+                    writer.begin_folder("Stops")
+                    self._write_stops(writer, route, stop_style_id)
+                    writer.end_folder()
+
+                writer.end_folder()
+
+            writer.end_document()
+
+    def _write_shapes(
+        self,
+        writer: StreamingKMLWriter,
+        route: Route,
+        include_multiple_shapes: bool,
+        style_id: str
+    ) -> None:
+        """
+        Write route shapes as LineString placemarks.
 
+        Args:
+            writer: Open streaming writer
+            route: Route containing shapes
+            include_multiple_shapes: If False, only write first shape
+            style_id: Line style referenced by each placemark
+        """
+        shapes_to_add = route.shapes if include_multiple_shapes else route.shapes[:1]
+
+        for idx, shape in enumerate(shapes_to_add):
+            if shape.coordinate_count == 0:
+                logger.warning(f"Shape {shape.shape_id} has no coordinates")
+                continue
+
+            if len(shapes_to_add) > 1:
+                name = f"{route.display_name} - Variant {idx + 1}"
+            else:
+                name = route.display_name
+
+            writer.add_linestring(name, shape.kml_coord_string, style_id)
+
+            logger.debug(
+                f"Added shape {shape.shape_id} with {shape.coordinate_count} points"
+            )
+
+    def _write_stops(self, writer: StreamingKMLWriter, route: Route, style_id: str) -> None:
+        """
+        Write route stops as Point placemarks.
+
+        Args:
+            writer: Open streaming writer
+            route: Route containing stops
+            style_id: Icon style referenced by each placemark
+        """
+        for stop in route.stops:
+            writer.add_point(
+                stop.stop_name,
+                (stop.stop_lat, stop.stop_lon),
+                style_id,
+                self._stop_description(stop),
+            )
+
+        logger.debug(f"Added {len(route.stops)} stops")
+
+    def _build_route_kml(
+        self,
+        route: Route,
+        include_multiple_shapes: bool,
+        color_index: int
+    ) -> "simplekml.Kml":
+        """Build a single route's KML document in memory with simplekml."""
+        simplekml = _import_simplekml()
         kml = simplekml.Kml()
         kml.document.name = f"Route {route.display_name}"
 
@@ -89,25 +288,11 @@ class KMLGenerator:
             stops_folder = kml.newfolder(name="Stops")
             self._add_stops_to_folder(stops_folder, route, color_index)
 
-        # Save KML file
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        kml.save(str(output_path))
-        logger.info(f"Saved KML to {output_path}")
-
-    def generate_all_routes_kml(
-        self,
-        routes: List[Route],
-        output_path: Path
-    ) -> None:
-        """
-        Generate a single KML file containing all routes.
-
-        Args:
-            routes: List of Route objects to include
-            output_path: Path where KML file will be saved
-        """
-        logger.info(f"Generating combined KML for {len(routes)} routes")
+        return kml
 
+    def _build_all_routes_kml(self, routes: List[Route]) -> "simplekml.Kml":
+        """Build a combined KML document in memory with simplekml."""
+        simplekml = _import_simplekml()
         kml = simplekml.Kml()
         kml.document.name = "All Routes"
 
@@ -127,14 +312,11 @@ class KMLGenerator:
                 stops_folder = route_folder.newfolder(name="Stops")
                 self._add_stops_to_folder(stops_folder, route, color_index=i)
 
-        # Save KML file
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        kml.save(str(output_path))
-        logger.info(f"Saved combined KML to {output_path}")
+        return kml
 
     def _add_shapes_to_folder(
         self,
-        folder: simplekml.Folder,
+        folder: "simplekml.Folder",
         route: Route,
         include_multiple_shapes: bool,
         color_index: int = 0
@@ -149,6 +331,11 @@ class KMLGenerator:
         """
         shapes_to_add = route.shapes if include_multiple_shapes else route.shapes[:1]
 
+        # Create a single shared style object for all of the route's lines
+        shared_style = _import_simplekml().Style()
+        shared_style.linestyle.color = self._color(color_index)
+        shared_style.linestyle.width = self.line_width
+
         for idx, shape in enumerate(shapes_to_add):
             if shape.coordinate_count == 0:
                 logger.warning(f"Shape {shape.shape_id} has no coordinates")
@@ -166,9 +353,8 @@ class KMLGenerator:
             # Set coordinates (KML expects lon, lat, altitude)
             linestring.coords = shape.kml_coordinates
 
-            # Set style
-            linestring.style.linestyle.color = self.PREDEFINED_COLORS[color_index % len(self.PREDEFINED_COLORS)]
-            linestring.style.linestyle.width = self.line_width
+            # Assign the shared style object
+            linestring.style = shared_style
 
             # Set altitude mode
             linestring.altitudemode = self.altitude_mode
@@ -179,7 +365,7 @@ class KMLGenerator:
 
     def _add_stops_to_folder(
         self,
-        folder: simplekml.Folder,
+        folder: "simplekml.Folder",
         route: Route,
         color_index: int = 0
     ) -> None:
@@ -192,12 +378,10 @@ class KMLGenerator:
         """
         # Create a single shared style object for all stops
         # All points will reference this same style object
-        shared_style = simplekml.Style()
-        shared_style.iconstyle.color = self.PREDEFINED_COLORS[color_index % len(self.PREDEFINED_COLORS)]
-        shared_style.iconstyle.scale = 0.8
-        shared_style.iconstyle.icon.href = (
-            "http://maps.google.com/mapfiles/kml/pushpin/ylw-pushpin.png"
-        )
+        shared_style = _import_simplekml().Style()
+        shared_style.iconstyle.color = self._color(color_index)
+        shared_style.iconstyle.scale = self.STOP_ICON_SCALE
+        shared_style.iconstyle.icon.href = self.STOP_ICON_HREF
 
         for stop in route.stops:
             point = folder.newpoint()
@@ -205,21 +389,31 @@ class KMLGenerator:
             point.coords = [stop.kml_coordinates]
 
             # Add description with stop details
-            description_parts = [f"Stop ID: {stop.stop_id}"]
-            if stop.stop_code:
-                description_parts.append(f"Stop Code: {stop.stop_code}")
-            point.description = "\n".join(description_parts)
+            point.description = self._stop_description(stop)
 
             # Assign the shared style object
             point.style = shared_style
 
         logger.debug(f"Added {len(route.stops)} stops")
 
+    def _color(self, color_index: int) -> str:
+        """Get the predefined color for a route index."""
+        return self.PREDEFINED_COLORS[color_index % len(self.PREDEFINED_COLORS)]
+
+    @staticmethod
+    def _stop_description(stop: Stop) -> str:
+        """Build the placemark description for a stop."""
+        description_parts = [f"Stop ID: {stop.stop_id}"]
+        if stop.stop_code:
+            description_parts.append(f"Stop Code: {stop.stop_code}")
+        return "\n".join(description_parts)
+
     def generate_batch(
         self,
         routes: List[Route],
         output_dir: Path,
-        split_by_route: bool = True
+        split_by_route: bool = True,
+        max_workers: int = 1
     ) -> List[Path]:
         """
         Generate KML files for multiple routes.
@@ -228,6 +422,10 @@ class KMLGenerator:
             routes: List of routes to process
             output_dir: Directory where KML files will be saved
             split_by_route: If True, create one file per route. If False, create single file.
+            max_workers: Number of processes used to write per-route files.
+                The default of 1 writes them sequentially in this process; callers
+                using more must guard their entry point with
+                ``if __name__ == "__main__"`` on spawn platforms.
 
         Returns:
             List of paths to generated KML files
@@ -236,11 +434,22 @@ class KMLGenerator:
 
         if split_by_route:
             logger.info(f"Generating {len(routes)} KML files (one per route)")
-            for i, route in enumerate(routes):
-                filename = f"{route.safe_filename}.kml"
-                output_path = output_dir / filename
-                self.generate_route_kml(route, output_path, color_index=i)
-                output_files.append(output_path)
+            output_paths = [output_dir / f"{route.safe_filename}.kml" for route in routes]
+
+            if max_workers == 1 or len(routes) < 2:
+                for i, (route, output_path) in enumerate(zip(routes, output_paths)):
+                    self.generate_route_kml(route, output_path, color_index=i)
+            else:
+                # Routes share no state once parsed, so files are written in parallel
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    list(executor.map(
+                        _write_one_route,
+                        [self._settings] * len(routes),
+                        routes,
+                        output_paths,
+                        range(len(routes)),
+                    ))
+            output_files.extend(output_paths)
         else:
             logger.info(f"Generating single KML file with {len(routes)} routes")
             output_path = output_dir / "all_routes.kml"
@@ -0,0 +1,229 @@
+"""
+Streaming KML writer.
+
+This module writes KML documents straight to disk as features are added,
+without building an in-memory document tree first.
+"""
+
+from pathlib import Path
+from typing import Optional, TextIO, Tuple, Union
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+KML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<kml xmlns="http://www.opengis.net/kml/2.2" '
+    'xmlns:gx="http://www.google.com/kml/ext/2.2">\n'
+)
+
+# Output buffer size; large coordinate lists are written in few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Coordinates are written as lon,lat,alt with 6 decimal places (~0.1 m),
+# the precision GTFS feeds are published with
+COORDINATE_FORMAT = "%.6f,%.6f,0"
+
+LINESTRING_TEMPLATE = (
+    "<Placemark><name>{name}</name><styleUrl>#{style_id}</styleUrl>"
+    "<LineString><altitudeMode>{altitude_mode}</altitudeMode>"
+    "<coordinates>{coords}</coordinates></LineString></Placemark>\n"
+)
+
+# Points are written once per stop, so they use a single %-format call
+# with fields (name, description, style_id, lon, lat)
+POINT_TEMPLATE = (
+    "<Placemark><name>%s</name>%s<styleUrl>#%s</styleUrl>"
+    "<Point><coordinates>" + COORDINATE_FORMAT + "</coordinates></Point></Placemark>\n"
+)
+
+
+def _cdata(text: str) -> str:
+    """
+    Wrap text in a CDATA section so it needs no entity escaping.
+
+    A literal "]]>" would end the section early, so it is split across two
+    sections.
+    """
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def format_coordinates(coords: np.ndarray) -> str:
+    """
+    Format (latitude, longitude) rows as a KML coordinates string.
+
+    All values go through one %-format call on a repeated template, rather
+    than one format call per point.
+
+    Args:
+        coords: (N, 2) array of (latitude, longitude) rows
+
+    Returns:
+        Space-separated "lon,lat,0" tuples
+    """
+    if len(coords) == 0:
+        return ""
+    template = f"{COORDINATE_FORMAT} " * len(coords)
+    return (template % tuple(coords[:, ::-1].ravel().tolist()))[:-1]
+
+
+class StreamingKMLWriter:
+    """
+    Incremental writer for KML documents.
+
+    Each element is written as soon as it is added, so memory use stays flat
+    regardless of how many placemarks or coordinates the document holds.
+    Callers are responsible for opening and closing documents and folders
+    in a well-nested order.
+
+    Example:
+        with StreamingKMLWriter(path) as writer:
+            writer.begin_document("All Routes")
+            writer.add_line_style("line-0", "ff0000ff", 4)
+            writer.add_linestring("Route 1", shape.coords, "line-0")
+            writer.end_document()
+    """
+
+    # Standard KML 2.2 altitude modes written as plain <altitudeMode>
+    ALTITUDE_MODES = frozenset({"clampToGround", "relativeToGround", "absolute"})
+
+    def __init__(self, output_path: Path, altitude_mode: str = "clampToGround"):
+        """
+        Initialize writer.
+
+        Args:
+            output_path: Path where the KML file will be written
+            altitude_mode: KML altitude mode applied to every LineString
+        """
+        self.output_path = Path(output_path)
+        self.altitude_mode = altitude_mode
+        self._file: Optional[TextIO] = None
+
+        # Fields fixed for the whole document are substituted once, leaving
+        # a single format_map call per placemark
+        self._linestring_template = LINESTRING_TEMPLATE.format(
+            name="{name}",
+            style_id="{style_id}",
+            altitude_mode=escape(altitude_mode),
+            coords="{coords}",
+        )
+
+    def __enter__(self) -> "StreamingKMLWriter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Open the output file and write the KML header."""
+        self._file = open(
+            self.output_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+        )
+        self._file.write(KML_HEADER)
+
+    def close(self) -> None:
+        """Write the closing tag and close the output file."""
+        if self._file is not None:
+            self._file.write("</kml>\n")
+            self._file.close()
+            self._file = None
+
+    def begin_document(self, name: str, description: Optional[str] = None) -> None:
+        """Open the top-level Document element."""
+        self._begin_container("Document", name, description)
+
+    def end_document(self) -> None:
+        """Close the top-level Document element."""
+        self._file.write("</Document>\n")
+
+    def begin_folder(self, name: str, description: Optional[str] = None) -> None:
+        """Open a Folder element."""
+        self._begin_container("Folder", name, description)
+
+    def end_folder(self) -> None:
+        """Close the current Folder element."""
+        self._file.write("</Folder>\n")
+
+    def add_line_style(self, style_id: str, color: str, width: float) -> None:
+        """
+        Add a shared line style to the current container.
+
+        Args:
+            style_id: Identifier referenced by placemarks via styleUrl
+            color: KML AABBGGRR color
+            width: Line width in pixels
+        """
+        self._file.write(
+            f'<Style id="{escape(style_id)}"><LineStyle>'
+            f"<color>{color}</color><width>{width}</width>"
+            f"</LineStyle></Style>\n"
+        )
+
+    def add_icon_style(self, style_id: str, color: str, scale: float, icon_href: str) -> None:
+        """
+        Add a shared icon style to the current container.
+
+        Args:
+            style_id: Identifier referenced by placemarks via styleUrl
+            color: KML AABBGGRR color
+            scale: Icon scale factor
+            icon_href: URL of the icon image
+        """
+        self._file.write(
+            f'<Style id="{escape(style_id)}"><IconStyle>'
+            f"<color>{color}</color><scale>{scale}</scale>"
+            f"<Icon><href>{escape(icon_href)}</href></Icon>"
+            f"</IconStyle></Style>\n"
+        )
+
+    def add_linestring(
+        self, name: str, coords: Union[np.ndarray, str], style_id: str
+    ) -> None:
+        """
+        Add a LineString placemark.
+
+        Args:
+            name: Placemark name
+            coords: (N, 2) array of (latitude, longitude) rows, or a string
+                already produced by format_coordinates
+            style_id: Identifier of a style added earlier
+        """
+        if not isinstance(coords, str):
+            coords = format_coordinates(coords)
+        self._file.write(self._linestring_template.format_map({
+            "name": escape(name),
+            "style_id": escape(style_id),
+            "coords": coords,
+        }))
+
+    def add_point(
+        self,
+        name: str,
+        coords: Tuple[float, float],
+        style_id: str,
+        description: Optional[str] = None,
+    ) -> None:
+        """
+        Add a Point placemark.
+
+        Args:
+            name: Placemark name
+            coords: (latitude, longitude) of the point
+            style_id: Identifier of a style added earlier
+            description: Optional placemark description
+        """
+        lat, lon = coords
+        # Descriptions are free text and often long; CDATA avoids escaping them
+        description_element = (
+            f"<description>{_cdata(description)}</description>" if description else ""
+        )
+        self._file.write(POINT_TEMPLATE % (
+            escape(name), description_element, escape(style_id), lon, lat
+        ))
+
+    def _begin_container(self, tag: str, name: str, description: Optional[str]) -> None:
+        """Open a Document or Folder with its name and description."""
+        self._file.write(f"<{tag}><name>{escape(name)}</name>\n")
+        if description:
+            self._file.write(f"<description>{escape(description)}</description>\n")
@@ -4,11 +4,49 @@ Data models for GTFS entities.
 This module defines the core data structures representing GTFS feed components.
 """
 
+import math
+import re
+import sys
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from functools import cached_property, lru_cache
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is required. Install it with: pip install numpy")
 
-@dataclass
+from .kml_writer import format_coordinates
+
+# Characters removed by Route.safe_filename
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+_NON_WORD_CHARS = re.compile(r'[^\w\-]')
+
+# Slotted dataclasses (Python 3.10+) drop the per-instance __dict__, which
+# matters for types created once per feed row. Route keeps its __dict__ for
+# cached_property.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_HEX_DIGITS = frozenset("0123456789ABCDEF")
+
+
+@lru_cache(maxsize=1024)
+def _rgb_to_kml(rgb: str) -> str:
+    """
+    Convert a GTFS RGB hex color to KML AABBGGRR with full opacity.
+
+    Feeds reuse a handful of colors across many routes, so results are
+    cached per color string. Invalid colors fall back to opaque white.
+    """
+    rgb = rgb.upper().zfill(6)
+    if len(rgb) != 6 or not _HEX_DIGITS.issuperset(rgb):
+        return "ffffffff"
+    return f"ff{rgb[4:6]}{rgb[2:4]}{rgb[0:2]}".lower()
+
+
+@dataclass(**_SLOTS)
 class Stop:
     """Represents a transit stop location."""
 
@@ -32,7 +70,117 @@ class Stop:
         return (self.stop_lon, self.stop_lat, 0)
 
 
-@dataclass
+class StopTable(Mapping):
+    """
+    Column-oriented table of stops, keyed by stop_id.
+
+    Each field is held in its own column rather than in one Stop object per
+    row: coordinates are float64 arrays, the remaining fields are lists, and
+    ``index`` maps each stop_id to its row. Looking up a stop_id builds a
+    Stop on demand, so only stops that are actually used become objects.
+    """
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.codes: List[Optional[str]] = []
+        self.location_types: List[int] = []
+        self.parent_stations: List[Optional[str]] = []
+        self.wheelchair_boarding: List[Optional[int]] = []
+        self._lat = np.empty(0, dtype=np.float64)
+        self._lon = np.empty(0, dtype=np.float64)
+        self._pending_lat: List[float] = []
+        self._pending_lon: List[float] = []
+
+    def append(
+        self,
+        stop_id: str,
+        stop_name: str,
+        stop_lat: float,
+        stop_lon: float,
+        stop_code: Optional[str] = None,
+        location_type: int = 0,
+        parent_station: Optional[str] = None,
+        wheelchair_boarding: Optional[int] = None,
+    ) -> None:
+        """Add a stop, replacing any earlier stop with the same stop_id."""
+        row = self.index.get(stop_id)
+        if row is not None:
+            self.names[row] = stop_name
+            self.codes[row] = stop_code
+            self.location_types[row] = location_type
+            self.parent_stations[row] = parent_station
+            self.wheelchair_boarding[row] = wheelchair_boarding
+            self._set_coordinates(row, stop_lat, stop_lon)
+            return
+
+        self.index[stop_id] = len(self.ids)
+        self.ids.append(stop_id)
+        self.names.append(stop_name)
+        self.codes.append(stop_code)
+        self.location_types.append(location_type)
+        self.parent_stations.append(parent_station)
+        self.wheelchair_boarding.append(wheelchair_boarding)
+        self._pending_lat.append(stop_lat)
+        self._pending_lon.append(stop_lon)
+
+    def _set_coordinates(self, row: int, stop_lat: float, stop_lon: float) -> None:
+        """Overwrite the coordinates of an existing row."""
+        flushed = len(self._lat)
+        if row < flushed:
+            self._lat[row] = stop_lat
+            self._lon[row] = stop_lon
+        else:
+            self._pending_lat[row - flushed] = stop_lat
+            self._pending_lon[row - flushed] = stop_lon
+
+    def _flush(self) -> None:
+        """Move appended coordinates into the coordinate arrays."""
+        if not self._pending_lat:
+            return
+        self._lat = np.concatenate((self._lat, np.array(self._pending_lat, dtype=np.float64)))
+        self._lon = np.concatenate((self._lon, np.array(self._pending_lon, dtype=np.float64)))
+        self._pending_lat = []
+        self._pending_lon = []
+
+    @property
+    def lat(self) -> np.ndarray:
+        """Return the latitude of each row."""
+        self._flush()
+        return self._lat
+
+    @property
+    def lon(self) -> np.ndarray:
+        """Return the longitude of each row."""
+        self._flush()
+        return self._lon
+
+    def __getitem__(self, stop_id: str) -> Stop:
+        row = self.index[stop_id]
+        self._flush()
+        return Stop(
+            stop_id,
+            self.names[row],
+            float(self._lat[row]),
+            float(self._lon[row]),
+            self.codes[row],
+            self.location_types[row],
+            self.parent_stations[row],
+            self.wheelchair_boarding[row],
+        )
+
+    def __contains__(self, stop_id: object) -> bool:
+        return stop_id in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass(**_SLOTS)
 class ShapePoint:
     """Represents a single point in a route shape."""
 
@@ -47,34 +195,227 @@ class ShapePoint:
         """Return KML-formatted coordinates (lon, lat, altitude)."""
         return (self.shape_pt_lon, self.shape_pt_lat, 0)
 
+    @classmethod
+    def _bulk_create(
+        cls,
+        shape_id: str,
+        lats: Sequence[float],
+        lons: Sequence[float],
+        sequences: Sequence[int],
+        dists: Sequence[Optional[float]],
+    ) -> List["ShapePoint"]:
+        """
+        Create many points of one shape without going through __init__.
 
-@dataclass
+        Fields are assigned directly on bare instances, which skips the
+        per-instance argument handling of the generated __init__. Every
+        field must be assigned here.
+
+        Args:
+            shape_id: Shape the points belong to
+            lats: Latitude per point
+            lons: Longitude per point
+            sequences: Sequence number per point
+            dists: Distance traveled per point, or None
+
+        Returns:
+            List of ShapePoint objects in input order
+        """
+        new = cls.__new__
+        points = []
+        append = points.append
+        for lat, lon, seq, dist in zip(lats, lons, sequences, dists):
+            point = new(cls)
+            point.shape_id = shape_id
+            point.shape_pt_lat = lat
+            point.shape_pt_lon = lon
+            point.shape_pt_sequence = seq
+            point.shape_dist_traveled = dist
+            append(point)
+        return points
+
+
+def _empty_coords() -> np.ndarray:
+    return np.empty((0, 2), dtype=np.float64)
+
+
+def _empty_sequences() -> np.ndarray:
+    return np.empty(0, dtype=np.int64)
+
+
+@dataclass(eq=False, **_SLOTS)
 class Shape:
-    """Represents a complete route shape (path geometry)."""
+    """
+    Represents a complete route shape (path geometry).
+
+    Points are stored as contiguous arrays rather than one ShapePoint object
+    per point: ``coords`` is an ``(N, 2)`` float64 array of (latitude,
+    longitude) rows, with matching ``sequences`` and optional
+    ``dist_traveled`` arrays. ``points`` builds a read-only tuple of
+    ShapePoint objects on demand; use ``add_point`` or assign ``points``
+    to change the shape.
+
+    The arrays are treated as immutable: methods that change the points
+    replace them, which also drops the cached ``kml_coord_string``.
+    """
 
     shape_id: str
-    points: List[ShapePoint] = field(default_factory=list)
+    _coords: np.ndarray = field(default_factory=_empty_coords, init=False, repr=False)
+    _sequences: np.ndarray = field(default_factory=_empty_sequences, init=False, repr=False)
+    _dist_traveled: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _pending: List[ShapePoint] = field(default_factory=list, init=False, repr=False)
+    _kml_coord_string: Optional[str] = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        shape_id: str,
+        coords: np.ndarray,
+        sequences: Optional[np.ndarray] = None,
+        dist_traveled: Optional[np.ndarray] = None,
+    ) -> "Shape":
+        """
+        Create a shape directly from coordinate arrays.
+
+        Args:
+            shape_id: Shape identifier
+            coords: Array-like of (latitude, longitude) rows
+            sequences: Point sequence numbers (defaults to 0..N-1)
+            dist_traveled: Distance along the shape per point, NaN where unknown
+
+        Returns:
+            New Shape backed by the given arrays
+        """
+        shape = cls(shape_id=shape_id)
+        shape._coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        count = len(shape._coords)
+        if sequences is None:
+            shape._sequences = np.arange(count, dtype=np.int64)
+        else:
+            shape._sequences = np.asarray(sequences, dtype=np.int64)
+        if dist_traveled is not None:
+            shape._dist_traveled = np.asarray(dist_traveled, dtype=np.float64)
+        return shape
 
     def add_point(self, point: ShapePoint) -> None:
         """Add a point to the shape, maintaining sequence order."""
-        self.points.append(point)
+        self._pending.append(point)
+        self._kml_coord_string = None
+
+    def _flush(self) -> None:
+        """Append points added with add_point to the coordinate arrays."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        coords = np.array(
+            [(p.shape_pt_lat, p.shape_pt_lon) for p in pending], dtype=np.float64
+        )
+        sequences = np.array([p.shape_pt_sequence for p in pending], dtype=np.int64)
+        dists = [p.shape_dist_traveled for p in pending]
+
+        if self._dist_traveled is not None or any(d is not None for d in dists):
+            if self._dist_traveled is None:
+                self._dist_traveled = np.full(len(self._coords), np.nan)
+            new_dists = np.array([np.nan if d is None else d for d in dists], dtype=np.float64)
+            self._dist_traveled = np.concatenate((self._dist_traveled, new_dists))
+
+        self._coords = np.concatenate((self._coords, coords))
+        self._sequences = np.concatenate((self._sequences, sequences))
 
     def sort_points(self) -> None:
         """Sort points by sequence number."""
-        self.points.sort(key=lambda p: p.shape_pt_sequence)
+        self._flush()
+        # Shapes usually arrive in order; an O(N) check skips the sort and copies
+        if np.all(self._sequences[1:] >= self._sequences[:-1]):
+            return
+        order = np.argsort(self._sequences, kind="stable")
+        self._kml_coord_string = None
+        self._coords = self._coords[order]
+        self._sequences = self._sequences[order]
+        if self._dist_traveled is not None:
+            self._dist_traveled = self._dist_traveled[order]
+
+    @property
+    def coords(self) -> np.ndarray:
+        """Return an (N, 2) array of (latitude, longitude) rows."""
+        self._flush()
+        return self._coords
+
+    @property
+    def sequences(self) -> np.ndarray:
+        """Return the sequence number of each point."""
+        self._flush()
+        return self._sequences
+
+    @property
+    def dist_traveled(self) -> Optional[np.ndarray]:
+        """Return distance traveled per point (NaN where unknown), if provided."""
+        self._flush()
+        return self._dist_traveled
+
+    @property
+    def points(self) -> Tuple[ShapePoint, ...]:
+        """
+        Return the shape's points as a tuple of new ShapePoint objects.
+
+        The points are copies of the arrays, so changing them does not
+        change the shape; the tuple makes ``shape.points.append(...)``
+        fail loudly instead of being silently lost.
+        """
+        self._flush()
+        if self._dist_traveled is None:
+            dists: Sequence[Optional[float]] = [None] * len(self._coords)
+        else:
+            dists = [None if math.isnan(d) else d for d in self._dist_traveled.tolist()]
+
+        return tuple(ShapePoint._bulk_create(
+            self.shape_id,
+            self._coords[:, 0].tolist(),
+            self._coords[:, 1].tolist(),
+            self._sequences.tolist(),
+            dists,
+        ))
+
+    @points.setter
+    def points(self, points: Iterable[ShapePoint]) -> None:
+        """Replace all points of the shape."""
+        self._coords = _empty_coords()
+        self._sequences = _empty_sequences()
+        self._dist_traveled = None
+        self._pending = list(points)
+        self._kml_coord_string = None
 
     @property
     def kml_coordinates(self) -> List[Tuple[float, float, float]]:
         """Return all points as KML coordinates (lon, lat, altitude)."""
-        return [point.kml_coordinates for point in self.points]
+        return list(self.kml_coordinates_iter)
+
+    @property
+    def kml_coordinates_iter(self) -> Iterator[Tuple[float, float, float]]:
+        """Lazily yield KML coordinates (lon, lat, altitude) without building a list."""
+        coords = self.coords
+        return zip(coords[:, 1].tolist(), coords[:, 0].tolist(), repeat(0))
+
+    @property
+    def kml_coord_string(self) -> str:
+        """
+        Return the KML <coordinates> text for this shape.
+
+        The string is formatted on first access and reused until the
+        shape's points change.
+        """
+        if self._kml_coord_string is None:
+            self._kml_coord_string = format_coordinates(self.coords)
+        return self._kml_coord_string
 
     @property
     def coordinate_count(self) -> int:
         """Return the number of points in this shape."""
-        return len(self.points)
+        return len(self._coords) + len(self._pending)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Trip:
     """Represents a single transit trip."""
 
@@ -109,29 +450,36 @@ class Route:
     shapes: List[Shape] = field(default_factory=list)
     stops: List[Stop] = field(default_factory=list)
 
-    @property
+    # IDs of the stops in self.stops, for constant-time duplicate checks, and
+    # the list they were collected from (stops may be reassigned or edited directly)
+    _stop_ids: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    _stop_ids_source: Optional[List[Stop]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @cached_property
     def display_name(self) -> str:
-        """Return a display-friendly route name."""
+        """Return a display-friendly route name (computed once per route)."""
         if self.route_short_name:
             return self.route_short_name
         return self.route_long_name
 
-    @property
+    @cached_property
     def safe_filename(self) -> str:
         """
         Return a filesystem-safe version of the route name.
 
         Removes or replaces characters that are problematic in filenames.
+        The result is computed once per route and cached.
         """
-        import re
         # Use route_short_name if available, otherwise route_long_name
         name = self.route_short_name or self.route_long_name
         # Replace spaces with underscores
         name = name.replace(" ", "_")
         # Remove or replace problematic characters
-        name = re.sub(r'[<>:"/\\|?*]', '', name)
+        name = _UNSAFE_FILENAME_CHARS.sub('', name)
         # Remove any other non-alphanumeric characters except underscore and hyphen
-        name = re.sub(r'[^\w\-]', '', name)
+        name = _NON_WORD_CHARS.sub('', name)
         # Truncate to reasonable length
         name = name[:100]
         return name or f"route_{self.route_id}"
@@ -144,14 +492,7 @@ class Route:
         GTFS uses RGB hex (e.g., 'FF0000' for red)
         KML uses AABBGGRR hex (e.g., 'ff0000ff' for opaque red)
         """
-        # Ensure 6-character hex
-        color = self.route_color.upper().zfill(6)
-        if len(color) != 6:
-            color = "FFFFFF"  # Default to white if invalid
-
-        # Convert RGB to BGR and add full opacity (FF)
-        r, g, b = color[0:2], color[2:4], color[4:6]
-        return f"ff{b}{g}{r}"
+        return _rgb_to_kml(self.route_color)
 
     def add_trip(self, trip: Trip) -> None:
         """Add a trip to this route."""
@@ -162,9 +503,15 @@ class Route:
         self.shapes.append(shape)
 
     def add_stop(self, stop: Stop) -> None:
-        """Add a stop to this route."""
-        if stop not in self.stops:
-            self.stops.append(stop)
+        """Add a stop to this route, ignoring stops already added by stop_id."""
+        if self._stop_ids_source is not self.stops or len(self._stop_ids) != len(self.stops):
+            # stops was reassigned or edited in place (e.g. cleared); rebuild the ID set
+            self._stop_ids = {existing.stop_id for existing in self.stops}
+            self._stop_ids_source = self.stops
+        if stop.stop_id in self._stop_ids:
+            return
+        self._stop_ids.add(stop.stop_id)
+        self.stops.append(stop)
 
     @property
     def has_shapes(self) -> bool:
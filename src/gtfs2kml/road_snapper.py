@@ -7,26 +7,52 @@ This module provides functionality to:
 3. Support multiple backend providers (Mapbox, OSRM, Google)
 """
 
+import hashlib
 import logging
+import threading
 import time
-from typing import List, Tuple, Optional, Dict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict
 from pathlib import Path
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is required. Install it with: pip install numpy")
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     raise ImportError("requests is required. Install it with: pip install requests")
 
+# pyproj is optional; its Geod computes exact geodesic distances for whole
+# arrays in compiled code instead of one geopy call per segment
+try:
+    from pyproj import Geod
+    _GEOD = Geod(ellps="WGS84")
+except ImportError:
+    _GEOD = None
+
+# orjson is optional; it decodes large match responses several times faster
 try:
-    from geopy.distance import geodesic
+    import orjson
+    _json_loads = orjson.loads
 except ImportError:
-    raise ImportError("geopy is required. Install it with: pip install geopy")
+    _json_loads = json.loads
 
-from .models import Shape, ShapePoint
+from ._io import atomic_write
+from .models import Shape
 
 logger = logging.getLogger(__name__)
 
+# Mean Earth radius (IUGG) in meters
+EARTH_RADIUS_METERS = 6371008.8
+
+# Coordinate pair format in map matching requests; 6 decimals is ~0.1m
+REQUEST_COORDINATE_FORMAT = "%.6f,%.6f"
+
 
 class RoadSnapperConfig:
     """Configuration for road snapping services."""
@@ -46,6 +72,15 @@ class RoadSnapperConfig:
     MAPBOX_RATE_LIMIT = 10
     GOOGLE_RATE_LIMIT = 10
 
+    # Maximum concurrent requests when shapes are snapped in parallel
+    OSRM_MAX_CONCURRENT_REQUESTS = 8
+    MAPBOX_MAX_CONCURRENT_REQUESTS = 1
+    GOOGLE_MAX_CONCURRENT_REQUESTS = 1
+
+    # Shapes snapped concurrently by snap_shapes_bulk, and pooled connections per host
+    BULK_SNAP_WORKERS = 8
+    HTTP_POOL_SIZE = 16
+
     # Maximum points per request (API limits)
     OSRM_MAX_POINTS = 100
     MAPBOX_MAX_POINTS = 100
@@ -58,6 +93,44 @@ class RoadSnapperConfig:
     GOOGLE_CHUNK_SIZE = 10
 
 
+class _RateLimiter:
+    """
+    Token bucket shared by every thread issuing requests to one provider.
+
+    A request that finds the bucket empty reserves the next token and sleeps
+    until it is due, so concurrent callers are spaced out rather than all
+    sleeping a fixed interval.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Initialize rate limiter.
+
+        Args:
+            rate: Tokens added per second (requests per second)
+            capacity: Maximum tokens held, i.e. the largest allowed burst
+        """
+        self._interval = 1.0 / rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) / self._interval
+            )
+            self._updated = now
+            # A negative balance is a reservation for a future token
+            self._tokens -= 1
+            wait = -self._tokens * self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
 class RoadSnapper:
     """
     Snaps GPS coordinates to road networks using map matching APIs.
@@ -86,6 +159,45 @@ class RoadSnapper:
         self.api_key = api_key
         self.cache_dir = cache_dir
 
+        # Snapped coordinates already computed in this process, by cache key,
+        # and futures for keys being snapped right now so that concurrent
+        # requests for the same shape wait for one result
+        self._memo: Dict[str, np.ndarray] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._memo_lock = threading.Lock()
+
+        # Marks snap_shapes_bulk worker threads, which snap chunks inline
+        # rather than opening a pool per shape
+        self._thread_state = threading.local()
+
+        # Bound in-flight requests so parallel snapping respects provider rate limits
+        max_concurrent = {
+            "osrm": RoadSnapperConfig.OSRM_MAX_CONCURRENT_REQUESTS,
+            "mapbox": RoadSnapperConfig.MAPBOX_MAX_CONCURRENT_REQUESTS,
+            "google": RoadSnapperConfig.GOOGLE_MAX_CONCURRENT_REQUESTS,
+        }.get(self.provider, 1)
+        self._max_concurrent = max_concurrent
+        self._request_slots = threading.Semaphore(max_concurrent)
+        self._rate_limiter = _RateLimiter({
+            "osrm": RoadSnapperConfig.OSRM_RATE_LIMIT,
+            "mapbox": RoadSnapperConfig.MAPBOX_RATE_LIMIT,
+            "google": RoadSnapperConfig.GOOGLE_RATE_LIMIT,
+        }.get(self.provider, 1))
+
+        # Request coordinate format, fixed per provider: OSRM and Mapbox take
+        # "lon,lat" pairs joined by ";", Google takes "lat,lon" joined by "|"
+        self._lon_first = self.provider != "google"
+        self._point_separator = "|" if self.provider == "google" else ";"
+
+        # Reuse keep-alive connections instead of a new TCP/TLS handshake per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=RoadSnapperConfig.HTTP_POOL_SIZE,
+            pool_maxsize=RoadSnapperConfig.HTTP_POOL_SIZE,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
         if self.cache_dir:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
 
@@ -110,15 +222,47 @@ class RoadSnapper:
         """
         logger.info(f"Snapping shape {shape.shape_id} with {shape.coordinate_count} points")
 
-        # Check cache
+        snapped_shape_id = f"{shape.shape_id}_snapped"
+
+        # Check results from this run first, including shapes still being
+        # snapped by another thread
+        cache_key = self._cache_key(shape.coords)
+        with self._memo_lock:
+            snapped_coords = self._memo.get(cache_key)
+            future = self._in_flight.get(cache_key)
+            owner = snapped_coords is None and future is None
+            if owner:
+                future = self._in_flight[cache_key] = Future()
+        if not owner:
+            if snapped_coords is None:
+                snapped_coords = future.result()
+            return self._build_snapped_shape(snapped_shape_id, snapped_coords)
+
+        try:
+            snapped_coords = self._snap_uncached(shape, cache_key, max_points_per_request)
+        except BaseException as e:
+            with self._memo_lock:
+                del self._in_flight[cache_key]
+            future.set_exception(e)
+            raise
+        with self._memo_lock:
+            self._memo[cache_key] = snapped_coords
+            del self._in_flight[cache_key]
+        future.set_result(snapped_coords)
+
+        return self._build_snapped_shape(snapped_shape_id, snapped_coords)
+
+    def _snap_uncached(
+        self, shape: Shape, cache_key: str, max_points_per_request: Optional[int]
+    ) -> np.ndarray:
+        """Load a shape from the on-disk cache, or snap it and cache the result."""
         if self.cache_dir:
-            cached_shape = self._load_from_cache(shape.shape_id)
-            if cached_shape:
+            snapped_coords = self._load_from_cache(cache_key)
+            if snapped_coords is not None:
                 logger.info(f"Loaded shape {shape.shape_id} from cache")
-                return cached_shape
+                return snapped_coords
 
-        # Extract coordinates
-        coordinates = [(p.shape_pt_lat, p.shape_pt_lon) for p in shape.points]
+        coordinates = shape.coords
 
         # Snap to roads based on provider
         if self.provider == "osrm":
@@ -130,82 +274,178 @@ class RoadSnapper:
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
 
-        # Create new shape with snapped coordinates
-        snapped_shape = Shape(shape_id=f"{shape.shape_id}_snapped")
-        for idx, (lat, lon) in enumerate(snapped_coords):
-            point = ShapePoint(
-                shape_id=snapped_shape.shape_id,
-                shape_pt_lat=lat,
-                shape_pt_lon=lon,
-                shape_pt_sequence=idx,
-            )
-            snapped_shape.add_point(point)
-
-        # Cache result
         if self.cache_dir:
-            self._save_to_cache(shape.shape_id, snapped_shape)
+            self._save_to_cache(
+                cache_key, self._build_snapped_shape(f"{shape.shape_id}_snapped", snapped_coords)
+            )
 
         logger.info(f"Snapped shape to {len(snapped_coords)} points")
-        return snapped_shape
+        return snapped_coords
 
-    def _snap_osrm(
-        self, coordinates: List[Tuple[float, float]], max_points: Optional[int] = None
-    ) -> List[Tuple[float, float]]:
-        """Snap coordinates using OSRM map matching."""
-        chunk_size = RoadSnapperConfig.OSRM_CHUNK_SIZE
-        max_points = max_points or RoadSnapperConfig.OSRM_MAX_POINTS
+    def snap_shapes_bulk(
+        self, shapes: List[Shape], max_workers: Optional[int] = None
+    ) -> List[Shape]:
+        """
+        Snap many shapes, reusing pooled connections.
+
+        Map matching treats every request as a single trace, so shapes cannot
+        share one request body; instead they are issued concurrently over the
+        session's keep-alive connection pool. Each worker snaps its shape's
+        chunks one after another, so the number of threads stays at
+        max_workers.
+
+        Args:
+            shapes: Shapes to snap
+            max_workers: Number of shapes snapped concurrently
+
+        Returns:
+            Snapped shapes, in the same order as the input
+        """
+        max_workers = max_workers or RoadSnapperConfig.BULK_SNAP_WORKERS
+
+        def snap(shape: Shape) -> Shape:
+            self._thread_state.in_bulk = True
+            return self.snap_shape(shape)
 
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(snap, shapes))
+
+    def _cache_key(self, coordinates: np.ndarray) -> str:
+        """
+        Build a cache key from the provider and the shape's coordinates.
+
+        Coordinates are rounded to 6 decimals (~0.1m) so that re-exported
+        feeds with insignificant float noise still hit the cache.
+        """
+        rounded = np.round(coordinates, 6)
+        digest = hashlib.blake2b(self.provider.encode(), digest_size=20)
+        digest.update(rounded.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _build_snapped_shape(shape_id: str, coordinates: np.ndarray) -> Shape:
+        """Create a new shape from snapped (lat, lon) coordinates."""
+        return Shape.from_arrays(shape_id, np.asarray(coordinates, dtype=np.float64))
+
+    def _format_points(self, coordinates: np.ndarray) -> List[str]:
+        """
+        Format (lat, lon) rows as the provider expects them in a request.
+
+        All values go through one %-format call. Six decimals (~0.1m) is the
+        precision the cache key is rounded to, so requests never carry more
+        detail than the cache distinguishes.
+        """
+        if len(coordinates) == 0:
+            return []
+        values = coordinates[:, ::-1] if self._lon_first else coordinates
+        template = f"{REQUEST_COORDINATE_FORMAT}\n" * len(values)
+        return (template % tuple(values.ravel().tolist())).split("\n")[:-1]
+
+    def _snap_in_chunks(
+        self,
+        coordinates: np.ndarray,
+        point_strs: List[str],
+        snap_chunk: Callable[[np.ndarray, List[str]], np.ndarray],
+        chunk_size: int,
+        overlap: int,
+    ) -> np.ndarray:
+        """
+        Snap coordinates in overlapping chunks and stitch the results.
+
+        Chunks are independent requests, so they are issued concurrently up
+        to the provider's request limit; results are stitched in order.
+        Within snap_shapes_bulk the shapes are already concurrent, and
+        chunks are snapped inline instead.
+
+        Args:
+            coordinates: (N, 2) array of (lat, lon) rows of the whole shape
+            point_strs: The same points formatted for the provider
+            snap_chunk: Provider method snapping one chunk
+            chunk_size: Points per request
+            overlap: Points shared by consecutive chunks
+
+        Returns:
+            (N, 2) array of snapped (lat, lon) rows
+        """
         # Handle short routes without chunking
         if len(coordinates) <= chunk_size:
-            return self._snap_osrm_chunk(coordinates)
+            return snap_chunk(coordinates, point_strs)
 
         # Split into overlapping chunks for continuity and better matching
         logger.info(f"Route has {len(coordinates)} points, splitting into chunks of {chunk_size}")
 
-        all_snapped = []
-        overlap = 2  # Overlap points between chunks for smooth transitions
         step_size = chunk_size - overlap
+        starts = list(range(0, len(coordinates) - overlap, step_size))
+        ends = [min(start + chunk_size, len(coordinates)) for start in starts]
 
-        for i in range(0, len(coordinates), step_size):
-            chunk_end = min(i + chunk_size, len(coordinates))
-            chunk = coordinates[i:chunk_end]
-
-            logger.debug(f"Processing chunk: points {i} to {chunk_end} ({len(chunk)} points)")
-            snapped_chunk = self._snap_osrm_chunk(chunk)
-
-            # Remove overlap from all but first chunk to avoid duplication
-            if i > 0:
-                # Remove first overlap/2 points from snapped result
-                snapped_chunk = snapped_chunk[overlap // 2 :]
+        def snap(start: int, end: int) -> np.ndarray:
+            logger.debug(f"Processing chunk: points {start} to {end} ({end - start} points)")
+            return snap_chunk(coordinates[start:end], point_strs[start:end])
 
-            all_snapped.extend(snapped_chunk)
+        max_workers = min(self._max_concurrent, len(starts))
+        if max_workers > 1 and not getattr(self._thread_state, "in_bulk", False):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                snapped_chunks = list(executor.map(snap, starts, ends))
+        else:
+            snapped_chunks = [snap(start, end) for start, end in zip(starts, ends)]
 
-            # Break if we've processed the last chunk
-            if chunk_end >= len(coordinates):
-                break
+        # Remove overlap from all but first chunk to avoid duplication; the
+        # trimmed chunks are copied into the output array in one pass
+        trim = overlap // 2
+        all_snapped = np.concatenate(
+            [snapped_chunks[0]] + [snapped_chunk[trim:] for snapped_chunk in snapped_chunks[1:]]
+        )
 
         logger.info(
-            f"Combined {len(all_snapped)} snapped points from {(len(coordinates) + step_size - 1) // step_size} chunks"
+            f"Combined {len(all_snapped)} snapped points from {len(snapped_chunks)} chunks"
         )
         return all_snapped
 
-    def _snap_osrm_chunk(self, coordinates: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
-        """Snap a single chunk of coordinates using OSRM map matching."""
+    def _snap_osrm(
+        self, coordinates: np.ndarray, max_points: Optional[int] = None
+    ) -> np.ndarray:
+        """Snap coordinates using OSRM map matching."""
+        chunk_size = RoadSnapperConfig.OSRM_CHUNK_SIZE
+
+        # Each point is formatted once; overlapping chunks share the strings
+        point_strs = self._format_points(coordinates)
+
+        return self._snap_in_chunks(
+            coordinates,
+            point_strs,
+            self._snap_osrm_chunk,
+            chunk_size,
+            overlap=2,
+        )
+
+    def _snap_osrm_chunk(
+        self,
+        coordinates: np.ndarray,
+        point_strs: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Snap a single chunk of coordinates using OSRM map matching.
+
+        Args:
+            coordinates: (N, 2) array of (lat, lon) rows of the chunk
+            point_strs: The same points already formatted as "lon,lat"
+        """
         # OSRM expects lon,lat format
-        coords_str = ";".join([f"{lon},{lat}" for lat, lon in coordinates])
+        if point_strs is None:
+            point_strs = self._format_points(coordinates)
+        coords_str = self._point_separator.join(point_strs)
 
         url = f"{RoadSnapperConfig.OSRM_BASE_URL}/match/v1/driving/{coords_str}"
         params = {"overview": "full", "geometries": "geojson", "annotations": "false"}
 
         logger.debug(f"Making OSRM request with {len(coordinates)} points")
 
-        # Rate limiting
-        time.sleep(1.0 / RoadSnapperConfig.OSRM_RATE_LIMIT)
-
         try:
-            response = requests.get(url, params=params, timeout=30)
+            with self._request_slots:
+                self._rate_limiter.acquire()
+                response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
 
             if data.get("code") != "Ok":
                 logger.warning(f"OSRM matching failed: {data.get('message')}")
@@ -225,69 +465,57 @@ class RoadSnapper:
             # Extract matched coordinates
             geometry = data["matchings"][0]["geometry"]["coordinates"]
             # Convert back to lat,lon
-            return [(lat, lon) for lon, lat in geometry]
+            return np.array(geometry, dtype=np.float64).reshape(-1, 2)[:, ::-1]
 
         except Exception as e:
             logger.error(f"OSRM snapping failed: {e}")
             return coordinates  # Fallback to original
 
     def _snap_mapbox(
-        self, coordinates: List[Tuple[float, float]], max_points: Optional[int] = None
-    ) -> List[Tuple[float, float]]:
+        self, coordinates: np.ndarray, max_points: Optional[int] = None
+    ) -> np.ndarray:
         """Snap coordinates using Mapbox Map Matching API."""
         chunk_size = RoadSnapperConfig.MAPBOX_CHUNK_SIZE
-        max_points = max_points or RoadSnapperConfig.MAPBOX_MAX_POINTS
 
-        # Handle short routes without chunking
-        if len(coordinates) <= chunk_size:
-            return self._snap_mapbox_chunk(coordinates)
+        # Each point is formatted once; overlapping chunks share the strings
+        point_strs = self._format_points(coordinates)
 
-        # Split into overlapping chunks for continuity and better matching
-        logger.info(f"Route has {len(coordinates)} points, splitting into chunks of {chunk_size}")
-
-        all_snapped = []
-        overlap = 5
-        step_size = chunk_size - overlap
-
-        for i in range(0, len(coordinates), step_size):
-            chunk_end = min(i + chunk_size, len(coordinates))
-            chunk = coordinates[i:chunk_end]
-
-            logger.debug(f"Processing chunk: points {i} to {chunk_end} ({len(chunk)} points)")
-            snapped_chunk = self._snap_mapbox_chunk(chunk)
-
-            if i > 0:
-                snapped_chunk = snapped_chunk[overlap // 2 :]
-
-            all_snapped.extend(snapped_chunk)
-
-            if chunk_end >= len(coordinates):
-                break
-
-        logger.info(
-            f"Combined {len(all_snapped)} snapped points from {(len(coordinates) + step_size - 1) // step_size} chunks"
+        return self._snap_in_chunks(
+            coordinates,
+            point_strs,
+            self._snap_mapbox_chunk,
+            chunk_size,
+            overlap=5,
         )
-        return all_snapped
 
     def _snap_mapbox_chunk(
-        self, coordinates: List[Tuple[float, float]]
-    ) -> List[Tuple[float, float]]:
-        """Snap a single chunk of coordinates using Mapbox Map Matching API."""
+        self,
+        coordinates: np.ndarray,
+        point_strs: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Snap a single chunk of coordinates using Mapbox Map Matching API.
+
+        Args:
+            coordinates: (N, 2) array of (lat, lon) rows of the chunk
+            point_strs: The same points already formatted as "lon,lat"
+        """
         # Mapbox expects lon,lat format
-        coords_str = ";".join([f"{lon},{lat}" for lat, lon in coordinates])
+        if point_strs is None:
+            point_strs = self._format_points(coordinates)
+        coords_str = self._point_separator.join(point_strs)
 
         url = f"{RoadSnapperConfig.MAPBOX_BASE_URL}/{coords_str}"
         params = {"access_token": self.api_key, "geometries": "geojson", "overview": "full"}
 
         logger.debug(f"Making Mapbox request with {len(coordinates)} points")
 
-        # Rate limiting
-        time.sleep(1.0 / RoadSnapperConfig.MAPBOX_RATE_LIMIT)
-
         try:
-            response = requests.get(url, params=params, timeout=30)
+            with self._request_slots:
+                self._rate_limiter.acquire()
+                response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
 
             if "matchings" not in data or len(data["matchings"]) == 0:
                 logger.warning("Mapbox matching returned no results")
@@ -296,68 +524,58 @@ class RoadSnapper:
             # Extract matched coordinates
             geometry = data["matchings"][0]["geometry"]["coordinates"]
             # Convert back to lat,lon
-            return [(lat, lon) for lon, lat in geometry]
+            return np.array(geometry, dtype=np.float64).reshape(-1, 2)[:, ::-1]
 
         except Exception as e:
             logger.error(f"Mapbox snapping failed: {e}")
             return coordinates
 
     def _snap_google(
-        self, coordinates: List[Tuple[float, float]], max_points: Optional[int] = None
-    ) -> List[Tuple[float, float]]:
+        self, coordinates: np.ndarray, max_points: Optional[int] = None
+    ) -> np.ndarray:
         """Snap coordinates using Google Roads API."""
         chunk_size = RoadSnapperConfig.GOOGLE_CHUNK_SIZE
-        max_points = max_points or RoadSnapperConfig.GOOGLE_MAX_POINTS
 
-        # Handle short routes without chunking
-        if len(coordinates) <= chunk_size:
-            return self._snap_google_chunk(coordinates)
+        # Each point is formatted once; overlapping chunks share the strings
+        point_strs = self._format_points(coordinates)
 
-        # Split into overlapping chunks for continuity and better matching
-        logger.info(f"Route has {len(coordinates)} points, splitting into chunks of {chunk_size}")
-
-        all_snapped = []
-        overlap = 5
-        step_size = chunk_size - overlap
-
-        for i in range(0, len(coordinates), step_size):
-            chunk_end = min(i + chunk_size, len(coordinates))
-            chunk = coordinates[i:chunk_end]
-
-            logger.debug(f"Processing chunk: points {i} to {chunk_end} ({len(chunk)} points)")
-            snapped_chunk = self._snap_google_chunk(chunk)
-
-            if i > 0:
-                snapped_chunk = snapped_chunk[overlap // 2 :]
-
-            all_snapped.extend(snapped_chunk)
-
-            if chunk_end >= len(coordinates):
-                break
-
-        logger.info(
-            f"Combined {len(all_snapped)} snapped points from {(len(coordinates) + step_size - 1) // step_size} chunks"
+        return self._snap_in_chunks(
+            coordinates,
+            point_strs,
+            self._snap_google_chunk,
+            chunk_size,
+            overlap=5,
         )
-        return all_snapped
 
     def _snap_google_chunk(
-        self, coordinates: List[Tuple[float, float]]
-    ) -> List[Tuple[float, float]]:
-        """Snap a single chunk of coordinates using Google Roads API."""
+        self,
+        coordinates: np.ndarray,
+        point_strs: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Snap a single chunk of coordinates using Google Roads API.
+
+        Args:
+            coordinates: (N, 2) array of (lat, lon) rows of the chunk
+            point_strs: The same points already formatted as "lat,lon"
+        """
         # Google expects lat,lon format
-        path = "|".join([f"{lat},{lon}" for lat, lon in coordinates])
+        if point_strs is None:
+            point_strs = self._format_points(coordinates)
+        path = self._point_separator.join(point_strs)
 
         params = {"path": path, "key": self.api_key, "interpolate": "true"}
 
         logger.debug(f"Making Google Roads request with {len(coordinates)} points")
 
-        # Rate limiting
-        time.sleep(1.0 / RoadSnapperConfig.GOOGLE_RATE_LIMIT)
-
         try:
-            response = requests.get(RoadSnapperConfig.GOOGLE_ROADS_URL, params=params, timeout=30)
+            with self._request_slots:
+                self._rate_limiter.acquire()
+                response = self.session.get(
+                    RoadSnapperConfig.GOOGLE_ROADS_URL, params=params, timeout=30
+                )
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
 
             if "snappedPoints" not in data:
                 logger.warning("Google Roads returned no snapped points")
@@ -368,53 +586,46 @@ class RoadSnapper:
                 (point["location"]["latitude"], point["location"]["longitude"])
                 for point in data["snappedPoints"]
             ]
-            return snapped
+            return np.array(snapped, dtype=np.float64).reshape(-1, 2)
 
         except Exception as e:
             logger.error(f"Google Roads snapping failed: {e}")
             return coordinates
 
-    def _load_from_cache(self, shape_id: str) -> Optional[Shape]:
-        """Load snapped shape from cache."""
-        cache_file = self.cache_dir / f"{shape_id}_snapped.json"
+    def _load_from_cache(self, cache_key: str) -> Optional[np.ndarray]:
+        """
+        Load snapped coordinates from cache.
+
+        Args:
+            cache_key: Key built by _cache_key
+
+        Returns:
+            (N, 2) array of (lat, lon) rows, or None if there is no usable entry
+        """
+        cache_file = self.cache_dir / f"{cache_key}.npz"
         if not cache_file.exists():
             return None
 
         try:
-            with open(cache_file, "r") as f:
-                data = json.load(f)
-
-            shape = Shape(shape_id=data["shape_id"])
-            for point_data in data["points"]:
-                point = ShapePoint(
-                    shape_id=shape.shape_id,
-                    shape_pt_lat=point_data["lat"],
-                    shape_pt_lon=point_data["lon"],
-                    shape_pt_sequence=point_data["seq"],
-                )
-                shape.add_point(point)
-
-            return shape
+            with np.load(cache_file, allow_pickle=False) as data:
+                return data["coords"]
 
         except Exception as e:
-            logger.warning(f"Failed to load cache for {shape_id}: {e}")
+            logger.warning(f"Failed to load cache entry {cache_key}: {e}")
             return None
 
-    def _save_to_cache(self, original_shape_id: str, snapped_shape: Shape) -> None:
-        """Save snapped shape to cache."""
-        cache_file = self.cache_dir / f"{original_shape_id}_snapped.json"
+    def _save_to_cache(self, cache_key: str, snapped_shape: Shape) -> None:
+        """Save snapped shape to cache as raw NumPy arrays."""
+        cache_file = self.cache_dir / f"{cache_key}.npz"
 
         try:
-            data = {
-                "shape_id": snapped_shape.shape_id,
-                "points": [
-                    {"lat": p.shape_pt_lat, "lon": p.shape_pt_lon, "seq": p.shape_pt_sequence}
-                    for p in snapped_shape.points
-                ],
-            }
-
-            with open(cache_file, "w") as f:
-                json.dump(data, f)
+            with atomic_write(cache_file) as f:
+                np.savez(
+                    f,
+                    shape_id=np.array(snapped_shape.shape_id),
+                    coords=snapped_shape.coords,
+                    seqs=snapped_shape.sequences,
+                )
 
             logger.debug(f"Cached snapped shape to {cache_file}")
 
@@ -459,64 +670,41 @@ class PathDensifier:
             return shape
 
         preserve_points = preserve_points or []
-        densified_points = []
-        sequence = 0
-
-        for i in range(len(shape.points) - 1):
-            p1 = shape.points[i]
-            p2 = shape.points[i + 1]
-
-            # Always add the first point
-            densified_points.append(
-                ShapePoint(
-                    shape_id=f"{shape.shape_id}_dense",
-                    shape_pt_lat=p1.shape_pt_lat,
-                    shape_pt_lon=p1.shape_pt_lon,
-                    shape_pt_sequence=sequence,
-                )
-            )
-            sequence += 1
-
-            # Calculate distance between points
-            coord1 = (p1.shape_pt_lat, p1.shape_pt_lon)
-            coord2 = (p2.shape_pt_lat, p2.shape_pt_lon)
-            distance = geodesic(coord1, coord2).meters
-
-            # Add intermediate points if distance exceeds interval
-            if distance > self.interval_meters:
-                num_segments = int(distance / self.interval_meters)
-
-                for seg in range(1, num_segments + 1):
-                    fraction = seg / (num_segments + 1)
-
-                    # Linear interpolation
-                    lat = p1.shape_pt_lat + fraction * (p2.shape_pt_lat - p1.shape_pt_lat)
-                    lon = p1.shape_pt_lon + fraction * (p2.shape_pt_lon - p1.shape_pt_lon)
-
-                    densified_points.append(
-                        ShapePoint(
-                            shape_id=f"{shape.shape_id}_dense",
-                            shape_pt_lat=lat,
-                            shape_pt_lon=lon,
-                            shape_pt_sequence=sequence,
-                        )
-                    )
-                    sequence += 1
-
-        # Add final point
-        last = shape.points[-1]
-        densified_points.append(
-            ShapePoint(
-                shape_id=f"{shape.shape_id}_dense",
-                shape_pt_lat=last.shape_pt_lat,
-                shape_pt_lon=last.shape_pt_lon,
-                shape_pt_sequence=sequence,
+        lats = shape.coords[:, 0]
+        lons = shape.coords[:, 1]
+
+        # Number of intermediate points to insert into each segment
+        seg_len = equirectangular_vector(lats[:-1], lons[:-1], lats[1:], lons[1:])
+        needs_insert = seg_len > self.interval_meters
+
+        if not needs_insert.any():
+            # Already dense enough; keep the points as they are
+            densified_shape = Shape.from_arrays(f"{shape.shape_id}_dense", shape.coords.copy())
+        else:
+            n_inserts = np.where(
+                needs_insert, np.floor(seg_len / self.interval_meters), 0
+            ).astype(np.int64)
+
+            # Each segment emits its start point followed by its inserted
+            # points; label every output slot with its segment and its
+            # position within that segment
+            counts = n_inserts + 1
+            seg = np.repeat(np.arange(len(counts)), counts)
+            seg_starts = np.cumsum(counts) - counts
+            step = np.arange(len(seg)) - np.repeat(seg_starts, counts)
+            fraction = step / counts[seg]
+
+            # Linear interpolation, then add the final point; longitudes
+            # take the short way across the antimeridian
+            out_lats = np.append(lats[seg] + fraction * (lats[seg + 1] - lats[seg]), lats[-1])
+            out_lons = lons[seg] + fraction * _wrap_longitude(lons[seg + 1] - lons[seg])
+            out_lons = np.append(
+                np.where(np.abs(out_lons) > 180.0, _wrap_longitude(out_lons), out_lons), lons[-1]
             )
-        )
 
-        # Create new shape
-        densified_shape = Shape(shape_id=f"{shape.shape_id}_dense")
-        densified_shape.points = densified_points
+            densified_shape = Shape.from_arrays(
+                f"{shape.shape_id}_dense", np.column_stack((out_lats, out_lons))
+            )
 
         logger.info(
             f"Densified shape from {shape.coordinate_count} to "
@@ -526,12 +714,70 @@ class PathDensifier:
         return densified_shape
 
 
-def calculate_path_distance(shape: Shape) -> float:
+def haversine_vector(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """
+    Calculate great-circle distances between arrays of points.
+
+    Args:
+        lat1: Start latitudes in degrees
+        lon1: Start longitudes in degrees
+        lat2: End latitudes in degrees
+        lon2: End longitudes in degrees
+
+    Returns:
+        Array of distances in meters
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _wrap_longitude(lon: np.ndarray) -> np.ndarray:
+    """Wrap longitudes or longitude differences into [-180, 180)."""
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+def equirectangular_vector(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """
+    Approximate distances between arrays of nearby points.
+
+    Uses the equirectangular projection, which needs a single cosine per
+    segment and stays within 0.5% of the great-circle distance for
+    segments up to a few kilometres. Use haversine_vector where exact
+    distances matter.
+
+    Args:
+        lat1: Start latitudes in degrees
+        lon1: Start longitudes in degrees
+        lat2: End latitudes in degrees
+        lon2: End longitudes in degrees
+
+    Returns:
+        Array of distances in meters
+    """
+    lat1, lon1, lat2, lon2 = map(np.asarray, (lat1, lon1, lat2, lon2))
+    dx = _wrap_longitude(lon2 - lon1) * np.cos(np.radians((lat1 + lat2) * 0.5))
+    dy = lat2 - lat1
+    return EARTH_RADIUS_METERS * np.radians(np.hypot(dx, dy))
+
+
+def calculate_path_distance(shape: Shape, use_fast: bool = False) -> float:
     """
     Calculate total distance of a shape path in meters.
 
     Args:
         shape: Shape to measure
+        use_fast: If False (the default), compute WGS84 geodesic distances,
+            in one batch call when pyproj is installed and with geopy per
+            segment otherwise. If True, sum a vectorized haversine over all
+            segments instead (spherical earth, within ~0.5% of geodesic).
 
     Returns:
         Total distance in meters
@@ -539,12 +785,26 @@ def calculate_path_distance(shape: Shape) -> float:
     if shape.coordinate_count < 2:
         return 0.0
 
+    if use_fast:
+        coords = shape.coords
+        lats, lons = coords[:, 0], coords[:, 1]
+        return float(haversine_vector(lats[:-1], lons[:-1], lats[1:], lons[1:]).sum())
+
+    if _GEOD is not None:
+        coords = shape.coords
+        lats, lons = coords[:, 0], coords[:, 1]
+        _, _, distances = _GEOD.inv(lons[:-1], lats[:-1], lons[1:], lats[1:])
+        return float(np.sum(distances))
+
+    # geopy is only needed here, when pyproj is not installed
+    try:
+        from geopy.distance import geodesic
+    except ImportError:
+        raise ImportError("pyproj or geopy is required. Install one with: pip install pyproj")
+
+    coordinates = shape.coords.tolist()
     total_distance = 0.0
-    for i in range(len(shape.points) - 1):
-        p1 = shape.points[i]
-        p2 = shape.points[i + 1]
-        coord1 = (p1.shape_pt_lat, p1.shape_pt_lon)
-        coord2 = (p2.shape_pt_lat, p2.shape_pt_lon)
+    for coord1, coord2 in zip(coordinates, coordinates[1:]):
         total_distance += geodesic(coord1, coord2).meters
 
     return total_distance
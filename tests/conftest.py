@@ -0,0 +1,16 @@
+"""
+Shared test fixtures.
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def umask():
+    """Run the test under a known umask, restoring the previous one afterwards."""
+    mask = 0o027
+    previous = os.umask(mask)
+    yield mask
+    os.umask(previous)
@@ -0,0 +1,64 @@
+"""
+Unit tests for the command-line interface.
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("requests")
+pytest.importorskip("simplekml")
+click_testing = pytest.importorskip("click.testing")
+
+from gtfs2kml.cli import main
+from gtfs2kml.road_snapper import RoadSnapper
+
+
+@pytest.fixture
+def gtfs_dir(tmp_path):
+    """Write a minimal GTFS feed with one route and one shape."""
+    feed = tmp_path / "feed"
+    feed.mkdir()
+    (feed / "routes.txt").write_text(
+        "route_id,route_short_name,route_long_name,route_type\n"
+        "R1,1,One,3\n"
+    )
+    (feed / "trips.txt").write_text(
+        "route_id,service_id,trip_id,shape_id\n"
+        "R1,WD,T1,S1\n"
+    )
+    (feed / "stops.txt").write_text(
+        "stop_id,stop_name,stop_lat,stop_lon\n"
+        "A,Stop A,1.30,103.80\n"
+    )
+    (feed / "shapes.txt").write_text(
+        "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence\n"
+        "S1,1.30,103.80,1\n"
+        "S1,1.31,103.81,2\n"
+    )
+    return feed
+
+
+def test_jobs_sets_snapping_workers(gtfs_dir, tmp_path, monkeypatch):
+    """Test that -j is passed to bulk snapping as the number of workers."""
+    workers = []
+
+    def fake_bulk(self, shapes, max_workers=None):
+        workers.append(max_workers)
+        return shapes
+
+    monkeypatch.setattr(RoadSnapper, "snap_shapes_bulk", fake_bulk)
+    output_dir = tmp_path / "out"
+
+    result = click_testing.CliRunner().invoke(
+        main, [str(gtfs_dir), str(output_dir), "--snap-to-roads", "-j", "3"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert workers == [3]
+    assert (output_dir / "1.kml").exists()
+
+
+def test_jobs_must_be_positive(gtfs_dir, tmp_path):
+    """Test that -j rejects values below one."""
+    result = click_testing.CliRunner().invoke(main, [str(gtfs_dir), str(tmp_path), "-j", "0"])
+    assert result.exit_code == 2
@@ -0,0 +1,178 @@
+"""
+Unit tests for GTFS parsing.
+"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from gtfs2kml.gtfs_parser import GTFSParser
+
+SHAPES_TXT = (
+    "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+    "S2,1.40,103.90,2,\n"
+    "S1,1.30,103.80,1,0.0\n"
+    "S2,1.30,103.90,1,0.0\n"
+    "S1,1.31,103.81,2,1.5\n"
+)
+
+
+@pytest.fixture
+def gtfs_dir(tmp_path):
+    """Write a minimal GTFS feed with two out-of-order shapes."""
+    feed = tmp_path / "feed"
+    feed.mkdir()
+    (feed / "routes.txt").write_text(
+        "route_id,route_short_name,route_long_name,route_type\n"
+        "R1,1,One,3\n"
+    )
+    (feed / "trips.txt").write_text(
+        "route_id,service_id,trip_id,shape_id\n"
+        "R1,WD,T1,S1\n"
+        "R1,WD,T2,S2\n"
+    )
+    (feed / "stops.txt").write_text(
+        "stop_id,stop_name,stop_lat,stop_lon,location_type\n"
+        "A,Stop A,1.30,103.80,0\n"
+    )
+    (feed / "shapes.txt").write_text(SHAPES_TXT)
+    return feed
+
+
+def shape_summary(parser):
+    """Return comparable (coords, sequences, distances) per shape."""
+    return {
+        shape_id: (
+            shape.coords.tolist(),
+            shape.sequences.tolist(),
+            # Missing distances are NaN, which never compares equal
+            np.nan_to_num(shape.dist_traveled, nan=-1.0).tolist(),
+        )
+        for shape_id, shape in parser.shapes.items()
+    }
+
+
+def test_parse_shapes_sorts_points(gtfs_dir):
+    """Test that shape points are grouped by shape and ordered by sequence."""
+    parser = GTFSParser(gtfs_dir)
+    routes = parser.parse()
+
+    assert [shape.shape_id for shape in routes["R1"].shapes] == ["S1", "S2"]
+    assert parser.shapes["S2"].coords.tolist() == [[1.30, 103.90], [1.40, 103.90]]
+    assert parser.shapes["S1"].sequences.tolist() == [1, 2]
+
+
+def test_parse_shapes_without_trailing_dist(gtfs_dir):
+    """Test that rows leaving off the optional shape_dist_traveled still parse."""
+    (gtfs_dir / "shapes.txt").write_text(
+        "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+        "S1,1.30,103.80,1,0.0\n"
+        "S1,1.31,103.81,2\n"
+        "S2,1.30,103.90,1\n"
+        "S2,1.40,103.90,2,2.5\n"
+    )
+    for route_filter in (None, {"R1"}):
+        parser = GTFSParser(gtfs_dir)
+        parser.parse(route_filter=route_filter)
+
+        assert shape_summary(parser) == {
+            "S1": ([[1.30, 103.80], [1.31, 103.81]], [1, 2], [0.0, -1.0]),
+            "S2": ([[1.30, 103.90], [1.40, 103.90]], [1, 2], [-1.0, 2.5]),
+        }
+
+
+def test_parse_cache_round_trip(gtfs_dir, tmp_path):
+    """Test that cached shapes match parsed shapes and go stale on change."""
+    cache_dir = tmp_path / "cache"
+    first = GTFSParser(gtfs_dir, cache_dir=cache_dir)
+    first.parse()
+    assert (cache_dir / GTFSParser.SHAPES_CACHE_FILE).exists()
+
+    cached = GTFSParser(gtfs_dir, cache_dir=cache_dir)
+    assert cached._load_shapes_cache(gtfs_dir / "shapes.txt")
+    assert shape_summary(cached) == shape_summary(first)
+
+    # A modified shapes.txt invalidates the cache
+    (gtfs_dir / "shapes.txt").write_text(SHAPES_TXT + "S3,1.5,103.5,1,\n")
+    stat = (gtfs_dir / "shapes.txt").stat()
+    os.utime(gtfs_dir / "shapes.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    stale = GTFSParser(gtfs_dir, cache_dir=cache_dir)
+    assert not stale._load_shapes_cache(gtfs_dir / "shapes.txt")
+    stale.parse()
+    assert "S3" in stale.shapes
+
+
+def test_corrupt_parse_cache_falls_back_to_parsing(gtfs_dir, tmp_path, umask):
+    """Test that a truncated cache archive is ignored and rewritten."""
+    cache_dir = tmp_path / "cache"
+    GTFSParser(gtfs_dir, cache_dir=cache_dir).parse()
+    cache_file = cache_dir / GTFSParser.SHAPES_CACHE_FILE
+    cache_file.write_bytes(cache_file.read_bytes()[:64])
+
+    parser = GTFSParser(gtfs_dir, cache_dir=cache_dir)
+    parser.parse()
+    assert set(parser.shapes) == {"S1", "S2"}
+    # Rewritten with the mode a plain open() would give, not mkstemp's 0600
+    assert cache_file.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_require_shapes_drops_shapeless_routes(gtfs_dir):
+    """Test that routes whose trips have no shapes are dropped on request."""
+    with open(gtfs_dir / "routes.txt", "a") as f:
+        f.write("R2,2,Two,3\n")
+    with open(gtfs_dir / "trips.txt", "a") as f:
+        f.write("R2,WD,T3,\n")
+
+    assert set(GTFSParser(gtfs_dir).parse()) == {"R1", "R2"}
+    assert set(GTFSParser(gtfs_dir).parse(require_shapes=True)) == {"R1"}
+
+
+def test_feed_files_found_case_insensitively(gtfs_dir):
+    """Test that feed files are found regardless of the case of their names."""
+    (gtfs_dir / "routes.txt").rename(gtfs_dir / "Routes.TXT")
+    (gtfs_dir / "shapes.txt").rename(gtfs_dir / "SHAPES.txt")
+
+    parser = GTFSParser(gtfs_dir)
+    assert set(parser.parse()) == {"R1"}
+    assert set(parser.shapes) == {"S1", "S2"}
+
+
+def test_route_filter_reads_only_used_shapes(gtfs_dir):
+    """Test that a route filter skips shapes no selected trip uses."""
+    (gtfs_dir / "shapes.txt").write_text(
+        SHAPES_TXT + 'S9,1.5,103.5,1,\n"S1",1.32,103.82,3,\n'
+    )
+    parser = GTFSParser(gtfs_dir)
+    parser.parse(route_filter={"R1"})
+
+    assert set(parser.shapes) == {"S1", "S2"}
+    # Quoted lines bypass the fast filter but are still parsed
+    assert parser.shapes["S1"].sequences.tolist() == [1, 2, 3]
+
+
+def test_route_filter_stops_reading_routes_once_found(gtfs_dir):
+    """Test that routes.txt is not read past the last requested route."""
+    # route_id is not the first column, so reading the short row would fail
+    (gtfs_dir / "routes.txt").write_text(
+        "route_short_name,route_id,route_long_name,route_type\n"
+        "1,R1,One,3\n"
+        "truncated\n"
+    )
+    parser = GTFSParser(gtfs_dir)
+    assert set(parser.parse(route_filter={"R1"})) == {"R1"}
+
+    with pytest.raises(IndexError):
+        GTFSParser(gtfs_dir).parse()
+
+
+def test_parse_without_trip_objects(gtfs_dir):
+    """Test that load_trips=False links the same shapes without Trip objects."""
+    parser = GTFSParser(gtfs_dir)
+    routes = parser.parse(load_trips=False)
+
+    assert parser.trips == {}
+    assert routes["R1"].trips == []
+    assert parser.trip_routes == {"T1": "R1", "T2": "R1"}
+    assert [shape.shape_id for shape in routes["R1"].shapes] == ["S1", "S2"]
@@ -0,0 +1,114 @@
+"""
+Unit tests for KML generation.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+pytest.importorskip("simplekml")
+
+from gtfs2kml.kml_generator import KMLGenerator
+from gtfs2kml.models import Route, Shape, ShapePoint, Stop
+
+KML_NS = {"kml": "http://www.opengis.net/kml/2.2"}
+
+
+def make_route():
+    """Build a route with one shape and one stop."""
+    route = Route(
+        route_id="route_1",
+        route_short_name="10 & 11",
+        route_long_name="",
+        route_type=3,
+        route_desc="Loop <express>"
+    )
+    shape = Shape(shape_id="shape_1")
+    shape.add_point(ShapePoint("shape_1", 1.5, 103.8, 1))
+    shape.add_point(ShapePoint("shape_1", 1.6, 103.9, 2))
+    route.add_shape(shape)
+    route.add_stop(Stop("stop_1", "Main St", 1.5, 103.8, stop_code="S1"))
+    return route
+
+
+def read_placemarks(path):
+    """Return (name, description, numeric coordinates) for each placemark."""
+    root = ET.parse(path).getroot()
+    return [
+        (
+            placemark.findtext("kml:name", namespaces=KML_NS),
+            placemark.findtext("kml:description", namespaces=KML_NS),
+            [
+                [float(value) for value in coordinate.split(",")]
+                for coordinate in placemark.findtext(".//kml:coordinates", namespaces=KML_NS).split()
+            ],
+        )
+        for placemark in root.iter(f"{{{KML_NS['kml']}}}Placemark")
+    ]
+
+
+@pytest.mark.parametrize("split", [True, False])
+def test_streaming_matches_simplekml(tmp_path, split):
+    """Test that streamed KML has the same placemarks as simplekml output."""
+    routes = [make_route()]
+    streamed = KMLGenerator(streaming=True).generate_batch(routes, tmp_path / "stream", split)
+    built = KMLGenerator(streaming=False).generate_batch(routes, tmp_path / "dom", split)
+
+    placemarks = read_placemarks(streamed[0])
+    assert placemarks == read_placemarks(built[0])
+    assert placemarks[0] == ("10 & 11", None, [[103.8, 1.5, 0], [103.9, 1.6, 0]])
+    assert placemarks[1] == ("Main St", "Stop ID: stop_1\nStop Code: S1", [[103.8, 1.5, 0]])
+
+
+def test_combined_kml_shares_styles_per_color(tmp_path):
+    """Test that routes with the same palette color reference one shared style."""
+    generator = KMLGenerator()
+    routes = [make_route() for _ in range(len(KMLGenerator.PREDEFINED_COLORS) + 1)]
+    path = generator.generate_batch(routes, tmp_path, split_by_route=False)[0]
+
+    root = ET.parse(path).getroot()
+    styles = root.findall(".//kml:Style", KML_NS)
+    assert len(styles) == 2 * len(KMLGenerator.PREDEFINED_COLORS)
+
+    line_styles = [
+        placemark.findtext("kml:styleUrl", namespaces=KML_NS)
+        for placemark in root.iter(f"{{{KML_NS['kml']}}}Placemark")
+        if placemark.find("kml:LineString", KML_NS) is not None
+    ]
+    # The route after the last palette color wraps around to the first style
+    assert line_styles[0] == line_styles[-1] == "#shared-0-line"
+
+
+def test_extension_altitude_mode_uses_simplekml(tmp_path):
+    """Test that gx altitude modes bypass the streaming writer."""
+    generator = KMLGenerator(altitude_mode="clampToSeaFloor")
+    assert not generator._use_streaming
+    path = generator.generate_batch([make_route()], tmp_path)[0]
+    assert "clampToSeaFloor" in path.read_text()
+
+
+def test_stop_description_survives_cdata_terminator(tmp_path):
+    """Test that a description containing ']]>' round-trips through CDATA."""
+    route = make_route()
+    route.stops = [Stop("a]]>b", "Odd & <stop>", 1.5, 103.8)]
+    path = KMLGenerator().generate_batch([route], tmp_path)[0]
+
+    assert read_placemarks(path)[1][:2] == ("Odd & <stop>", "Stop ID: a]]>b")
+
+
+def test_parallel_batch_matches_sequential(tmp_path):
+    """Test that per-route files written by worker processes match sequential output."""
+    routes = []
+    for i in range(3):
+        route = make_route()
+        route.route_id = f"route_{i}"
+        route.route_short_name = f"Route {i}"
+        routes.append(route)
+
+    generator = KMLGenerator()
+    sequential = generator.generate_batch(routes, tmp_path / "seq", max_workers=1)
+    parallel = generator.generate_batch(routes, tmp_path / "par", max_workers=2)
+
+    assert [path.name for path in parallel] == [path.name for path in sequential]
+    for seq_path, par_path in zip(sequential, parallel):
+        assert par_path.read_bytes() == seq_path.read_bytes()
@@ -3,7 +3,7 @@ Unit tests for data models.
 """
 
 import pytest
-from gtfs2kml.models import Route, Shape, ShapePoint, Stop
+from gtfs2kml.models import Route, Shape, ShapePoint, Stop, StopTable
 
 
 def test_stop_coordinates():
@@ -19,6 +19,24 @@ def test_stop_coordinates():
     assert stop.kml_coordinates == (103.8000, 1.5000, 0)
 
 
+def test_stop_table():
+    """Test StopTable lookups, coordinate columns and duplicate stop_ids."""
+    table = StopTable()
+    table.append("stop_1", "First", 1.5, 103.8, stop_code="S1")
+    table.append("stop_2", "Second", 1.6, 103.9)
+
+    assert len(table) == 2
+    assert "stop_1" in table and "stop_3" not in table
+    assert table["stop_1"] == Stop("stop_1", "First", 1.5, 103.8, stop_code="S1")
+    assert table.lat.tolist() == [1.5, 1.6]
+
+    # A repeated stop_id replaces the earlier row, as with a dict
+    table.append("stop_1", "First (moved)", 1.55, 103.85)
+    assert list(table) == ["stop_1", "stop_2"]
+    assert table["stop_1"].stop_name == "First (moved)"
+    assert table.lon.tolist() == [103.85, 103.9]
+
+
 def test_shape_point_kml_coordinates():
     """Test ShapePoint KML coordinate conversion."""
     point = ShapePoint(
@@ -45,6 +63,51 @@ def test_shape_sorting():
     sequences = [p.shape_pt_sequence for p in shape.points]
     assert sequences == [1, 2, 3]
 
+    # Already sorted points are left in place without copying
+    coords = shape.coords
+    shape.sort_points()
+    assert shape.coords is coords
+
+
+def test_shape_from_arrays():
+    """Test Shape construction from coordinate arrays."""
+    shape = Shape.from_arrays("shape_1", [(1.5, 103.8), (1.6, 103.9)])
+
+    assert shape.coordinate_count == 2
+    assert shape.coords.shape == (2, 2)
+    assert shape.kml_coordinates == [(103.8, 1.5, 0), (103.9, 1.6, 0)]
+    assert list(shape.kml_coordinates_iter) == shape.kml_coordinates
+    assert [p.shape_pt_sequence for p in shape.points] == [0, 1]
+    assert shape.dist_traveled is None
+
+
+def test_shape_points_round_trip():
+    """Test that points added one at a time keep all their fields."""
+    shape = Shape(shape_id="shape_1")
+    shape.add_point(ShapePoint("shape_1", 1.5, 103.8, 1, shape_dist_traveled=0.0))
+    shape.add_point(ShapePoint("shape_1", 1.6, 103.9, 2))
+
+    assert shape.coordinate_count == 2
+    points = shape.points
+    assert points[0] == ShapePoint("shape_1", 1.5, 103.8, 1, 0.0)
+    assert points[1] == ShapePoint("shape_1", 1.6, 103.9, 2, None)
+
+    # points is a read-only snapshot; changes go through add_point
+    with pytest.raises(AttributeError):
+        points.append(ShapePoint("shape_1", 1.7, 104.0, 3))
+
+
+def test_shape_kml_coord_string_refreshed_on_change():
+    """Test that the cached KML coordinate string follows point changes."""
+    shape = Shape.from_arrays("shape_1", [(1.5, 103.8)])
+    assert shape.kml_coord_string == "103.800000,1.500000,0"
+
+    shape.add_point(ShapePoint("shape_1", 1.6, 103.9, 1))
+    assert shape.kml_coord_string == "103.800000,1.500000,0 103.900000,1.600000,0"
+
+    shape.points = []
+    assert shape.kml_coord_string == ""
+
 
 def test_route_display_name():
     """Test Route display name logic."""
@@ -115,6 +178,12 @@ def test_route_kml_color_conversion():
     )
     assert route3.kml_color == "ffff0000"
 
+    # Short colors are zero-padded; invalid ones fall back to white
+    route3.route_color = "ff"
+    assert route3.kml_color == "ffff0000"
+    route3.route_color = "GG0000"
+    assert route3.kml_color == "ffffffff"
+
 
 def test_route_relationships():
     """Test Route relationship management."""
@@ -140,3 +209,17 @@ def test_route_relationships():
     # Adding same stop twice shouldn't duplicate
     route.add_stop(stop)
     assert len(route.stops) == 1
+    # Stops are deduplicated by stop_id, not by object
+    route.add_stop(Stop("stop_1", "Test Stop", 1.5, 103.8))
+    assert len(route.stops) == 1
+
+    # Reassigning stops, even to a list of the same length, resets the IDs
+    route.stops = [Stop("stop_2", "Other Stop", 1.6, 103.9)]
+    route.add_stop(Stop("stop_1", "Test Stop", 1.5, 103.8))
+    route.add_stop(Stop("stop_2", "Other Stop", 1.6, 103.9))
+    assert [stop.stop_id for stop in route.stops] == ["stop_2", "stop_1"]
+
+    # Clearing the list in place forgets the old IDs too
+    route.stops.clear()
+    route.add_stop(Stop("stop_1", "Test Stop", 1.5, 103.8))
+    assert [stop.stop_id for stop in route.stops] == ["stop_1"]
@@ -0,0 +1,175 @@
+"""
+Unit tests for road snapping and path densification.
+"""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("requests")
+
+from gtfs2kml.models import Shape, ShapePoint
+from gtfs2kml.road_snapper import (
+    PathDensifier,
+    RoadSnapper,
+    calculate_path_distance,
+    equirectangular_vector,
+    haversine_vector,
+)
+
+
+def make_shape(coords):
+    """Build a shape from (lat, lon) pairs."""
+    shape = Shape(shape_id="shape_1")
+    for seq, (lat, lon) in enumerate(coords):
+        shape.add_point(ShapePoint("shape_1", lat, lon, seq))
+    return shape
+
+
+def test_haversine_vector():
+    """Test vectorized haversine against a known distance."""
+    # One degree of latitude is roughly 111.2 km
+    distances = haversine_vector([0.0, 1.0], [0.0, 103.8], [1.0, 1.0], [0.0, 103.8])
+    assert distances[0] == pytest.approx(111195, rel=1e-3)
+    assert distances[1] == 0.0
+
+
+def test_equirectangular_vector_close_to_haversine():
+    """Test the approximate distance on bus-route scale segments."""
+    lat1, lon1 = [1.30, 40.0, 60.0], [103.80, -74.0, 10.0]
+    lat2, lon2 = [1.31, 40.005, 60.003], [103.81, -73.99, 10.01]
+    exact = haversine_vector(lat1, lon1, lat2, lon2)
+    approx = equirectangular_vector(lat1, lon1, lat2, lon2)
+    assert approx == pytest.approx(exact, rel=5e-3)
+
+
+def test_calculate_path_distance_fast_matches_geodesic():
+    """Test that the vectorized path length agrees with geopy's geodesic."""
+    pytest.importorskip("geopy")
+    shape = make_shape([(1.0, 103.8), (1.01, 103.8), (1.01, 103.81), (1.3, 104.0)])
+    exact = calculate_path_distance(shape)
+    assert exact == calculate_path_distance(shape, use_fast=False)
+    assert calculate_path_distance(shape, use_fast=True) == pytest.approx(exact, rel=5e-3)
+    assert calculate_path_distance(make_shape([(1.0, 103.8)])) == 0.0
+
+
+def test_densify_inserts_points():
+    """Test that long segments are split at the requested interval."""
+    # ~1112m segment followed by a ~11m segment
+    shape = make_shape([(1.0, 103.8), (1.01, 103.8), (1.0101, 103.8)])
+    densified = PathDensifier(interval_meters=100.0).densify_shape(shape)
+
+    # 11 points inserted into the first segment, none into the second
+    assert densified.coordinate_count == 3 + 11
+    assert densified.shape_id == "shape_1_dense"
+
+    # Original points are preserved in order
+    lats = [p.shape_pt_lat for p in densified.points]
+    assert lats[0] == 1.0
+    assert lats[12] == 1.01
+    assert lats[-1] == 1.0101
+    assert lats == sorted(lats)
+
+    sequences = [p.shape_pt_sequence for p in densified.points]
+    assert sequences == list(range(densified.coordinate_count))
+
+
+def test_densify_across_antimeridian():
+    """Test that a short segment across 180 degrees is not treated as a long way round."""
+    shape = Shape.from_arrays("fiji", np.array([[-17.0, 179.99], [-17.0, -179.99]]))
+
+    densified = PathDensifier(interval_meters=100.0).densify_shape(shape)
+
+    assert 20 <= densified.coordinate_count <= 25
+    lons = densified.coords[:, 1]
+    assert np.all(np.abs(lons) >= 179.99)
+    assert np.all(np.abs(lons) <= 180.0)
+
+
+def test_densify_short_shape_unchanged():
+    """Test that shapes with fewer than two points are returned as-is."""
+    shape = make_shape([(1.0, 103.8)])
+    assert PathDensifier().densify_shape(shape) is shape
+
+
+def test_snap_cache_keyed_by_coordinates(tmp_path, monkeypatch, umask):
+    """Test that snapped results are reused for identical coordinates."""
+    calls = []
+
+    def fake_snap(self, coordinates, max_points=None):
+        calls.append(len(coordinates))
+        return [(lat + 0.001, lon) for lat, lon in coordinates]
+
+    monkeypatch.setattr(RoadSnapper, "_snap_osrm", fake_snap)
+
+    coords = [(1.0, 103.8), (1.01, 103.8)]
+    snapper = RoadSnapper(provider="osrm", cache_dir=tmp_path)
+    first = snapper.snap_shape(make_shape(coords))
+    # Same geometry under a different shape_id hits the in-process cache
+    other = make_shape(coords)
+    other.shape_id = "shape_2"
+    second = snapper.snap_shape(other)
+
+    assert len(calls) == 1
+    assert second.shape_id == "shape_2_snapped"
+    assert [p.shape_pt_lat for p in second.points] == [p.shape_pt_lat for p in first.points]
+
+    # A fresh snapper loads the result from disk
+    fresh = RoadSnapper(provider="osrm", cache_dir=tmp_path)
+    third = fresh.snap_shape(make_shape(coords))
+    assert len(calls) == 1
+    assert third.coordinate_count == 2
+    assert not list(tmp_path.glob("*.tmp"))
+    entries = list(tmp_path.glob("*.npz"))
+    assert len(entries) == 1
+    # Entries get the mode a plain open() would give, not mkstemp's 0600
+    assert entries[0].stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_snap_cache_ignores_json_entries(tmp_path):
+    """Test that JSON entries from older versions are not trusted as snapped output."""
+    snapper = RoadSnapper(provider="osrm", cache_dir=tmp_path)
+    shape = make_shape([(1.0, 103.8), (1.01, 103.8)])
+    cache_key = snapper._cache_key(shape.coords)
+    entry = (
+        '{"shape_id": "shape_1_snapped", "points": ['
+        '{"lat": 1.0, "lon": 103.81, "seq": 0}, {"lat": 1.01, "lon": 103.81, "seq": 1}]}'
+    )
+    (tmp_path / f"{cache_key}.json").write_text(entry)
+    (tmp_path / "shape_1_snapped.json").write_text(entry)
+
+    assert snapper._load_from_cache(cache_key) is None
+
+
+def test_bulk_snaps_identical_shapes_once(monkeypatch):
+    """Test that identical shapes snapped concurrently share one provider call."""
+    calls = []
+
+    def fake_snap(self, coordinates, max_points=None):
+        calls.append(len(coordinates))
+        time.sleep(0.05)
+        return coordinates + 0.001
+
+    monkeypatch.setattr(RoadSnapper, "_snap_osrm", fake_snap)
+    shapes = [make_shape([(1.0, 103.8), (1.01, 103.8)]) for _ in range(4)]
+
+    snapped = RoadSnapper(provider="osrm").snap_shapes_bulk(shapes, max_workers=4)
+
+    assert calls == [2]
+    assert all(shape.coords.tolist() == snapped[0].coords.tolist() for shape in snapped)
+
+
+def test_parallel_chunks_stitched_in_order(monkeypatch):
+    """Test that concurrently snapped chunks are combined in shape order."""
+    monkeypatch.setattr(
+        RoadSnapper, "_snap_osrm_chunk", lambda self, coordinates, point_strs: coordinates
+    )
+    coordinates = np.array([(1.0 + i * 0.001, 103.8) for i in range(50)])
+
+    snapper = RoadSnapper(provider="osrm")
+    parallel = snapper._snap_osrm(coordinates).tolist()
+    snapper._max_concurrent = 1
+    assert parallel == snapper._snap_osrm(coordinates).tolist()
+    assert parallel[0] == [1.0, 103.8] and parallel[-1] == coordinates[-1].tolist()
+    assert parallel == sorted(parallel)